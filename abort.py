@@ -0,0 +1,85 @@
+import math
+
+########################
+#   ABORT CRITERIA     #
+########################
+
+# each criterion returns a short reason when the run should stop,
+# None otherwise
+
+class non_finite_state():
+    def check(self, sim):
+        for p in sim.scene.points:
+            # a single sum is non-finite as soon as any term is
+            if not math.isfinite(p.pos.x + p.pos.y + p.vel.x + p.vel.y):
+                return "non-finite state at " + p.get_name()
+
+        return None
+
+class max_link_strain():
+    def __init__(self, limit):
+        self.limit = limit
+
+    def check(self, sim):
+        # strain is left on the links by the last force evaluation
+        for l in sim.scene.links:
+            if abs(l.get_strain()) > self.limit:
+                return "link " + l.get_name() + " strained past " + str(self.limit)
+
+        return None
+
+class max_attitude_error():
+    def __init__(self, limit):
+        # degrees
+        self.limit = limit
+
+    def check(self, sim):
+        c = sim.controller
+        if abs(c.desired_flight_angle - math.degrees(c.current_angle)) > self.limit:
+            return "attitude error past " + str(self.limit) + " deg"
+
+        return None
+
+class ground_impact():
+    def __init__(self, margin=0):
+        self.margin = margin
+
+    def check(self, sim):
+        height = sim.floor.get_height() + self.margin
+        for p in sim.scene.points:
+            if p.pos.y <= height:
+                return "ground impact at " + p.get_name()
+
+        return None
+
+class abort_monitor():
+    # checked by the simulation every check_every steps, cheap criteria
+    # should come first since checking stops at the first hit
+    def __init__(self, criteria, check_every=100):
+        self.criteria = criteria
+        self.check_every = check_every
+
+    def check(self, sim):
+        for c in self.criteria:
+            reason = c.check(sim)
+            if reason:
+                return reason
+
+        return None
+
+def build_criteria(strain=None, attitude=None, ground=None):
+    # the given criteria, cheapest first, always guarding against a
+    # diverged state
+    criteria = []
+    if attitude is not None:
+        criteria.append(max_attitude_error(attitude))
+    criteria.append(non_finite_state())
+    if ground is not None:
+        criteria.append(ground_impact(ground))
+    if strain is not None:
+        criteria.append(max_link_strain(strain))
+
+    return criteria
+
+def default_abort_monitor(check_every=100):
+    return abort_monitor([non_finite_state(), ground_impact(), max_link_strain(0.5)], check_every)
@@ -0,0 +1,226 @@
+import math
+import random
+
+from vector2 import *
+
+########################
+#    LOOKUP TABLES     #
+########################
+
+class lookup_table():
+    # values sampled on a uniform grid: a lookup is one index computation
+    # and a linear interpolation, clamped at both ends of the table
+    def __init__(self, x0, step, values):
+        self.x0 = x0
+        self.step = step
+        self.values = values
+
+    def get(self, x):
+        i = (x - self.x0) / self.step
+        if i <= 0:
+            return self.values[0]
+
+        last = len(self.values) - 1
+        if i >= last:
+            return self.values[last]
+
+        k = int(i)
+        return self.values[k] + (self.values[k + 1] - self.values[k]) * (i - k)
+
+def tabulate(func, x0, x1, step):
+    n = int(math.ceil((x1 - x0) / step)) + 1
+    return lookup_table(x0, step, [func(x0 + i * step) for i in range(n)])
+
+########################
+#  STANDARD ATMOSPHERE #
+########################
+
+# base altitude (m), lapse rate (K/m) of the 1976 standard atmosphere layers
+isa_layers = [(0, -0.0065), (11000, 0), (20000, 0.001), (32000, 0.0028),
+              (47000, 0), (51000, -0.0028), (71000, -0.002), (84852, 0)]
+isa_T0 = 288.15  # K
+isa_P0 = 101325  # Pa
+isa_g0 = 9.80665  # m/s^2
+isa_R = 287.053  # J/(kg K)
+
+def std_atmosphere(h):
+    # temperature (K), pressure (Pa) and density (kg/m^3) at altitude h
+    h = max(h, 0)
+    T = isa_T0
+    P = isa_P0
+
+    for i in range(len(isa_layers)):
+        base, lapse = isa_layers[i]
+        if i + 1 < len(isa_layers):
+            top = min(h, isa_layers[i + 1][0])
+        else:
+            top = h
+
+        dh = top - base
+        if lapse == 0:
+            P_top = P * math.exp(-isa_g0 * dh / (isa_R * T))
+            T_top = T
+        else:
+            T_top = T + lapse * dh
+            P_top = P * (T_top / T) ** (-isa_g0 / (lapse * isa_R))
+
+        T = T_top
+        P = P_top
+        if i + 1 >= len(isa_layers) or h <= isa_layers[i + 1][0]:
+            break
+
+    return T, P, P / (isa_R * T)
+
+def std_density(h):
+    return std_atmosphere(h)[2]
+
+########################
+#        GUSTS         #
+########################
+
+class gust_series(lookup_table):
+    # gust velocity against time. runs longer than the precomputed part
+    # extend it on demand, the filter carries on from the last sample
+    # with its own random stream, so gusts never freeze into a constant
+    # offset and the precomputed part is the same however long the run
+    def __init__(self, step, values, a, b):
+        lookup_table.__init__(self, 0, step, values)
+        self.a = a
+        self.b = b
+        # set once the precomputed series are drawn, see atmosphere.reseed
+        self.rng = None
+
+    def get(self, t):
+        if t > (len(self.values) - 1) * self.step:
+            self.extend(t)
+
+        return lookup_table.get(self, t)
+
+    def extend(self, t):
+        # at least doubles the series, so the cost per step stays O(1)
+        # on average
+        values = self.values
+        n = max(int(math.ceil(t / self.step)) + 1, 2 * len(values))
+        u = values[-1]
+        while len(values) < n:
+            u = self.a * u + self.b * self.rng.gauss(0, 1)
+            values.append(u)
+
+def dryden_gusts(intensity, scale_length, airspeed, duration, step, rng):
+    # first order (Dryden longitudinal) shaping filter driven by white
+    # noise, discretized exactly for the sampling step
+    a = math.exp(-airspeed * step / scale_length)
+    b = intensity * math.sqrt(1 - a * a)
+
+    n = int(math.ceil(duration / step)) + 1
+    values = [0] * n
+    u = rng.gauss(0, intensity)
+    for i in range(n):
+        values[i] = u
+        u = a * u + b * rng.gauss(0, 1)
+
+    return gust_series(step, values, a, b)
+
+########################
+#      ATMOSPHERE      #
+########################
+
+class atmosphere():
+    # density, steady wind and gusts are all precomputed into tables when
+    # the atmosphere is created, a simulation step only interpolates them.
+    # gusts past duration are drawn as the run reaches them
+    def __init__(self, wind_speed=0, wind_ref_alt=10, wind_exponent=1/7,
+                 gust_intensity=0, gust_length=300, gust_airspeed=100,
+                 duration=600, seed=None, drag_coeff=1.2,
+                 max_alt=100000, alt_step=50, gust_step=0.01):
+        self.drag_coeff = drag_coeff
+        self.power = 0
+
+        self.wind_speed = wind_speed
+        self.wind_ref_alt = wind_ref_alt
+        self.wind_exponent = wind_exponent
+        self.max_alt = max_alt
+        self.alt_step = alt_step
+
+        self.gust_intensity = gust_intensity
+        self.gust_length = gust_length
+        self.gust_airspeed = gust_airspeed
+        self.duration = duration
+        self.gust_step = gust_step
+
+        self.density = tabulate(std_density, 0, max_alt, alt_step)
+
+        # power law wind profile, blowing towards +x
+        def wind_profile(h):
+            if h <= 0:
+                return 0
+            return wind_speed * (h / wind_ref_alt) ** wind_exponent
+
+        self.wind = tabulate(wind_profile, 0, max_alt, alt_step)
+
+        self.reseed(seed)
+
+    def reseed(self, seed):
+        # regenerates the gust series, the same seed gives the same gusts.
+        # without one a seed is drawn and kept, so saving the scene still
+        # captures the gusts this run sees
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        rng = random.Random(seed)
+
+        if self.gust_intensity:
+            self.gust_x = dryden_gusts(self.gust_intensity, self.gust_length, self.gust_airspeed,
+                                       self.duration, self.gust_step, rng)
+            self.gust_y = dryden_gusts(self.gust_intensity, self.gust_length / 2, self.gust_airspeed,
+                                       self.duration, self.gust_step, rng)
+            # streams for extending the series past duration
+            self.gust_x.rng = random.Random(rng.getrandbits(64))
+            self.gust_y.rng = random.Random(rng.getrandbits(64))
+        else:
+            self.gust_x = None
+            self.gust_y = None
+
+    def get_density(self, h):
+        return self.density.get(h)
+
+    def get_wind(self, h, t):
+        wind = vec2(self.wind.get(h), 0)
+
+        if self.gust_x:
+            wind = wind + vec2(self.gust_x.get(t), self.gust_y.get(t))
+
+        return wind
+
+    def apply_drag(self, links, t):
+        # pressure drag on the exposed area of each link, driven by the
+        # air velocity component normal to the link
+        power = 0
+
+        for l in links:
+            if not l.exposed_width:
+                continue
+
+            p1 = l.p1
+            p2 = l.p2
+            axis = p2.pos - p1.pos
+            length = axis.mag()
+            if not length:
+                continue
+
+            h = (p1.pos.y + p2.pos.y) / 2
+            rho = self.density.get(h)
+            if not rho:
+                continue
+
+            normal = vec2(-axis.y / length, axis.x / length)
+            air_vel = self.get_wind(h, t) - (p1.vel + p2.vel) / 2
+            normal_vel = air_vel.dot(normal)
+
+            force = normal * (0.5 * rho * self.drag_coeff * length * l.exposed_width * normal_vel * abs(normal_vel))
+            p1.apply_force(force / 2)
+            p2.apply_force(force / 2)
+            power += force.dot(p1.vel + p2.vel) / 2
+
+        # rate of work done on the structure by the last evaluation
+        self.power = power
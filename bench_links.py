@@ -0,0 +1,52 @@
+import time
+
+from rocket import *
+
+# per-link cost of the link force kernel on the default rocket, against
+# the kernel it replaced
+
+def legacy_apply_force(self):
+    if get_dist_between(self.p1, self.p2) > self.dist:
+        self.p1.apply_force(
+            self.p1.get_unit_vector_towards(self.p2) * self.k * abs(get_dist_between(self.p1, self.p2) - self.dist))
+        self.p2.apply_force(
+            self.p2.get_unit_vector_towards(self.p1) * self.k * abs(get_dist_between(self.p1, self.p2) - self.dist))
+
+    elif get_dist_between(self.p1, self.p2) < self.dist:
+        self.p1.apply_force(self.p1.get_unit_vector_towards(self.p2) * -self.k * abs(
+            get_dist_between(self.p1, self.p2) - self.dist))
+        self.p2.apply_force(self.p2.get_unit_vector_towards(self.p1) * -self.k * abs(
+            get_dist_between(self.p1, self.p2) - self.dist))
+
+    # damping
+    if not self.b == 0:
+        rel_outvel = (self.p2.vel - self.p1.vel) - (self.p2.pos - self.p1.pos) * (self.p2.vel - self.p1.vel).dot((self.p2.pos - self.p1.pos).normalized())
+        self.p2.apply_force(self.p2.get_unit_vector_towards(self.p1) * rel_outvel.mag() * self.b)
+        self.p1.apply_force(self.p2.get_unit_vector_towards(self.p1) * rel_outvel.mag() * -self.b)
+
+def time_kernel(kernel, links, points, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for l in links:
+            kernel(l)
+        for p in points:
+            p.clear_accel()
+
+    return (time.perf_counter() - start) / (repeats * len(links))
+
+if __name__ == "__main__":
+    sim = build_rocket()
+    # fly a little so links are strained and moving
+    sim.run(0.5)
+
+    links = list(sim.scene.links)
+    points = list(sim.scene.points)
+    repeats = 2000
+
+    before = time_kernel(legacy_apply_force, links, points, repeats)
+    after = time_kernel(rigid_link.apply_force, links, points, repeats)
+
+    print(str(len(links)) + " links, " + str(repeats) + " evaluations each")
+    print("before: " + str(round(before * 1e9)) + " ns/link")
+    print("after:  " + str(round(after * 1e9)) + " ns/link")
+    print("speedup: " + str(round(before / after, 2)) + "x")
@@ -0,0 +1,155 @@
+import math
+
+from vector2 import *
+
+########################
+#    ENGINE CLUSTER    #
+########################
+
+class engine_cluster():
+    # several thrusts with their own gimbal actuators. actuator state and
+    # parameters live in parallel lists so that all engines are stepped
+    # and their thrust applied in one pass, and the cluster doubles as
+    # the mixer that spreads the TVC command over the engines
+    def __init__(self):
+        self.thrusts = []
+        self.arms = []
+
+        # actuator parameters (deg, deg/s, rad/s)
+        self.max_rates = []
+        self.max_angles = []
+        self.natural_freqs = []
+        self.damping_ratios = []
+        self.backlashes = []
+
+        # actuator state: commanded angle, actuator angle and rate, and
+        # the nozzle angle, which lags the actuator by the backlash
+        self.commands = []
+        self.angles = []
+        self.rates = []
+        self.nozzles = []
+
+    def add_engine(self, thrust, arm=1, max_rate=None, max_angle=math.inf,
+                   natural_freq=None, damping_ratio=0.7, backlash=0):
+        # without a natural frequency the actuator slews at max_rate
+        # straight towards its command, like a lone thrust does
+        self.thrusts.append(thrust)
+        self.arms.append(arm)
+        self.max_rates.append(max_rate if max_rate is not None else thrust.offset_rate)
+        self.max_angles.append(max_angle)
+        self.natural_freqs.append(natural_freq)
+        self.damping_ratios.append(damping_ratio)
+        self.backlashes.append(backlash)
+
+        self.commands.append(thrust.offset)
+        self.angles.append(thrust.offset)
+        self.rates.append(0)
+        self.nozzles.append(thrust.offset)
+        return thrust
+
+    def get_authority(self, i):
+        # turning moment per degree of gimbal
+        return self.thrusts[i].magnitude * self.arms[i]
+
+    def command(self, offset):
+        # the TVC command is the gimbal angle the full cluster would need,
+        # turned into a turning moment and re-allocated over the engines
+        # that are still firing
+        torque = offset * sum(self.get_authority(i) for i in range(len(self.thrusts)))
+        self.allocate(torque)
+
+    def allocate(self, torque):
+        # least squares allocation. engines that would pass their angle
+        # limit are pinned at it and the rest of the moment is spread over
+        # the remaining ones
+        n = len(self.thrusts)
+        commands = [0] * n
+        free = [i for i in range(n) if self.thrusts[i].active and self.get_authority(i)]
+
+        while free:
+            norm = sum(self.get_authority(i) ** 2 for i in free)
+            pinned = []
+
+            for i in free:
+                angle = self.get_authority(i) * torque / norm
+                if abs(angle) > self.max_angles[i]:
+                    pinned.append((i, math.copysign(self.max_angles[i], angle)))
+                else:
+                    commands[i] = angle
+
+            if not pinned:
+                break
+
+            for i, angle in pinned:
+                commands[i] = angle
+                torque -= self.get_authority(i) * angle
+                free.remove(i)
+
+        self.commands = commands
+
+    def update(self, dt):
+        n = len(self.thrusts)
+        commands = self.commands
+        angles = self.angles
+        rates = self.rates
+        nozzles = self.nozzles
+
+        # actuators
+        for i in range(n):
+            max_rate = self.max_rates[i]
+            wn = self.natural_freqs[i]
+
+            if wn is None:
+                step = commands[i] - angles[i]
+                limit = max_rate * dt
+                if step > limit:
+                    step = limit
+                elif step < -limit:
+                    step = -limit
+                rates[i] = step / dt if dt else 0
+                angles[i] += step
+            else:
+                rate = rates[i] + (wn * wn * (commands[i] - angles[i]) -
+                                   2 * self.damping_ratios[i] * wn * rates[i]) * dt
+                rates[i] = min(max(rate, -max_rate), max_rate)
+                angles[i] += rates[i] * dt
+
+            max_angle = self.max_angles[i]
+            if angles[i] > max_angle:
+                angles[i] = max_angle
+                rates[i] = 0
+            elif angles[i] < -max_angle:
+                angles[i] = -max_angle
+                rates[i] = 0
+
+            # backlash, the nozzle only moves once the actuator takes up
+            # the slack
+            half_gap = self.backlashes[i] / 2
+            if angles[i] - nozzles[i] > half_gap:
+                nozzles[i] = angles[i] - half_gap
+            elif nozzles[i] - angles[i] > half_gap:
+                nozzles[i] = angles[i] + half_gap
+
+        # thrust
+        for i in range(n):
+            t = self.thrusts[i]
+            t.offset = nozzles[i]
+
+            ax = t.p2.pos.x - t.origin.pos.x
+            ay = t.p2.pos.y - t.origin.pos.y
+            length = math.sqrt(ax * ax + ay * ay)
+            if not length:
+                continue
+
+            rot = math.radians(nozzles[i])
+            c = math.cos(rot)
+            s = math.sin(rot)
+            dx = (ax * c - ay * s) / length
+            dy = (ax * s + ay * c) / length
+            t.direction = vec2(dx, dy)
+
+            if t.active:
+                accel = t.origin.accel
+                accel.x += dx * t.magnitude / t.origin.mass
+                accel.y += dy * t.magnitude / t.origin.mass
+                t.burn_time += dt
@@ -0,0 +1,80 @@
+import hashlib
+import struct
+
+########################
+#        SEEDS         #
+########################
+
+def derive_seed(seed, name):
+    # independent, process-stable seed for each stochastic input, unlike
+    # hash() which is salted per interpreter
+    digest = hashlib.sha256((str(seed) + ":" + name).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+########################
+#     STATE HASHES     #
+########################
+
+class state_hasher():
+    # running hash of the exact bits of the simulation state, checkpointed
+    # every n steps. each checkpoint folds in the previous one, so two runs
+    # that agree on a checkpoint agreed on every checkpoint before it. the
+    # steps in between are not hashed
+    def __init__(self, every=100):
+        self.every = every
+        self.hash = hashlib.blake2b(digest_size=8)
+        # (cycle, hex digest)
+        self.log = []
+
+    def update(self, sim):
+        if sim.cycle % self.every:
+            return
+
+        values = [sim.sim_time]
+        for p in sim.scene.points:
+            values.append(p.pos.x)
+            values.append(p.pos.y)
+            values.append(p.vel.x)
+            values.append(p.vel.y)
+        for t in sim.thrusts:
+            values.append(t.offset)
+
+        self.hash.update(struct.pack("<" + str(len(values)) + "d", *values))
+        self.log.append((sim.cycle, self.hash.hexdigest()))
+
+    def get_digest(self):
+        return self.hash.hexdigest()
+
+def compare_hash_logs(log_a, log_b):
+    # (last cycle both runs agree on, first cycle they differ at), the
+    # second is None if they never differ
+    last_equal = 0
+    for (cycle_a, digest_a), (cycle_b, digest_b) in zip(log_a, log_b):
+        if cycle_a != cycle_b:
+            raise ValueError("hash logs were taken at different steps")
+        if digest_a != digest_b:
+            return last_equal, cycle_a
+        last_equal = cycle_a
+
+    return last_equal, None
+
+def pinpoint_divergence(build_a, build_b, until, dt=0.001, every=100):
+    # runs two simulations side by side with coarse checkpoints, then
+    # replays them hashing every step up to the first differing
+    # checkpoint. returns the first step whose state differs, or None
+    def hashed_run(build, every, stop):
+        sim = build()
+        hasher = state_hasher(every)
+        sim.set_hasher(hasher)
+        while sim.sim_time < until and sim.cycle < stop:
+            sim.step(dt)
+        return hasher.log
+
+    forever = float("inf")
+    last_equal, first_diff = compare_hash_logs(hashed_run(build_a, every, forever),
+                                               hashed_run(build_b, every, forever))
+    if first_diff is None:
+        return None
+
+    return compare_hash_logs(hashed_run(build_a, 1, first_diff),
+                             hashed_run(build_b, 1, first_diff))[1]
@@ -0,0 +1,174 @@
+import math
+
+import physics
+
+########################
+#    ENERGY BUDGET     #
+########################
+
+# columns of the energy history, energies and work in J, momenta in
+# kg m/s and kg m^2/s. work done by dissipative forces is kept as the
+# (positive) energy they removed
+budget_columns = ["time", "kinetic", "spring", "gravity", "thrust_work", "force_work",
+                  "link_damping", "ground", "drag", "residual",
+                  "momentum_x", "momentum_y", "angular_momentum"]
+
+class energy_monitor():
+    # reads the totals the force pass leaves behind: the power lost to
+    # link damping and drag is summed by the links and points as they
+    # apply their forces, the floor keeps its contacts and the atmosphere
+    # the power its drag did. an update at the end of a step then only
+    # adds the few thrusts and constant forces, so a step never makes a
+    # pass of its own over the links or points. the energies are state
+    # functions and are only summed every few steps, when a row of the
+    # budget is taken. work is integrated with the velocities at the
+    # start of each step, so the residual is the energy the integrator
+    # itself created or lost
+    def __init__(self, every=10):
+        self.every = every
+
+        self.thrust_work = 0
+        self.force_work = 0
+        self.link_damping = 0
+        self.ground = 0
+        self.drag = 0
+
+        # mechanical energy when the monitor started, the budget is
+        # relative to it
+        self.initial_energy = None
+
+        self.history = []
+        self.last = None
+
+    def start(self, sim):
+        self.initial_energy = None
+        self.history.append(self.sample(sim))
+
+    def update(self, sim, dt):
+        # called once the points have moved, while they still hold the
+        # accelerations of the step
+        thrust_power = 0
+        for t in sim.thrusts:
+            o = t.origin
+            if t.active and not o.static:
+                # back to the velocity at the start of the step
+                vx = o.vel.x - o.accel.x * dt
+                vy = o.vel.y - o.accel.y * dt
+                thrust_power += (t.direction.x * vx + t.direction.y * vy) * t.magnitude
+
+        force_power = 0
+        for f in sim.scene.forces:
+            p = f.point
+            if not p.static:
+                force_power += (f.force.x * (p.vel.x - p.accel.x * dt) +
+                                f.force.y * (p.vel.y - p.accel.y * dt))
+
+        # contact forces are impulses, their work is taken over the
+        # velocity change of the whole step rather than its start. lifting
+        # a point back onto the surface works against everything else
+        # acting on it, its links as much as gravity
+        ground_work = 0
+        for p, force, lift in sim.floor.contacts:
+            if p.static:
+                continue
+            ax = p.accel.x
+            ay = p.accel.y
+            ground_work += (force.x * (p.vel.x - ax * dt / 2) + force.y * (p.vel.y - ay * dt / 2)) * dt
+            if lift:
+                ground_work -= (p.mass * ay - force.y) * lift
+
+        if sim.atmosphere:
+            drag_power = -sim.atmosphere.power
+        else:
+            drag_power = sim.drag_power
+
+        self.thrust_work += thrust_power * dt
+        self.force_work += force_power * dt
+        self.link_damping += sim.damping_power * dt
+        self.ground -= ground_work
+        self.drag += drag_power * dt
+
+        if sim.cycle % self.every == 0:
+            self.history.append(self.sample(sim))
+
+    def sample(self, sim):
+        # a budget row for the current state against the work done so far
+        kinetic = 0
+        gravity_pe = 0
+        mass = mx = my = px = py = moment = 0
+
+        gravity_model = sim.gravity_model
+        g = physics.gravity.mag()
+
+        for p in sim.scene.points:
+            if p.static:
+                continue
+
+            m = p.mass
+            x = p.pos.x
+            y = p.pos.y
+            vx = p.vel.x
+            vy = p.vel.y
+
+            kinetic += 0.5 * m * (vx * vx + vy * vy)
+            if gravity_model:
+                gravity_pe += m * gravity_model.get_potential(y)
+            else:
+                gravity_pe += m * g * y
+
+            mass += m
+            mx += m * x
+            my += m * y
+            px += m * vx
+            py += m * vy
+            moment += m * (x * vy - y * vx)
+
+        # from the current positions, the lengths the links keep are from
+        # before the points moved
+        spring = 0
+        for l in sim.scene.links:
+            dx = l.p2.pos.x - l.p1.pos.x
+            dy = l.p2.pos.y - l.p1.pos.y
+            extension = math.sqrt(dx * dx + dy * dy) - l.dist
+            spring += 0.5 * l.k * extension * extension
+
+        # angular momentum about the centre of mass
+        if mass:
+            moment -= (mx * py - my * px) / mass
+
+        energy = kinetic + spring + gravity_pe
+        if self.initial_energy is None:
+            self.initial_energy = energy
+
+        residual = (energy - self.initial_energy - self.thrust_work - self.force_work +
+                    self.link_damping + self.ground + self.drag)
+
+        self.last = (sim.sim_time, kinetic, spring, gravity_pe, self.thrust_work, self.force_work,
+                     self.link_damping, self.ground, self.drag, residual, px, py, moment)
+        return self.last
+
+    def get_budget(self):
+        # the latest row as a dict of budget_columns
+        if not self.last:
+            return None
+
+        return dict(zip(budget_columns, self.last))
+
+    def write_csv(self, path):
+        with open(path, "w") as f:
+            f.write(",".join(budget_columns) + "\n")
+            for row in self.history:
+                f.write(",".join(repr(v) for v in row) + "\n")
+
+def format_energy_budget(budget):
+    lines = ["Energy budget at " + ("%.3f" % budget["time"]) + " s (J)"]
+    for name in budget_columns[1:10]:
+        lines.append("  " + name + ": " + ("%.6g" % budget[name]))
+
+    # how far the books are off, relative to the energy moving through them
+    scale = budget["kinetic"] + budget["spring"] + abs(budget["thrust_work"]) + \
+            abs(budget["force_work"]) + budget["link_damping"] + abs(budget["ground"]) + abs(budget["drag"])
+    if scale:
+        lines.append("  relative residual: " + ("%.3g" % (budget["residual"] / scale)))
+
+    return "\n".join(lines)
@@ -0,0 +1,103 @@
+import heapq
+
+########################
+#       ACTIONS        #
+########################
+
+class break_links():
+    def __init__(self, links):
+        self.links = links
+
+    def apply(self, sim):
+        for l in self.links:
+            sim.scene.remove_link(l)
+
+class detach_points():
+    # cuts every link between the group and the rest of the scene,
+    # leaving the group as an independent body
+    def __init__(self, group):
+        self.group = group
+
+    def apply(self, sim):
+        group_ids = set(p.id for p in self.group)
+
+        for p in self.group:
+            for l in sim.scene.get_links_of(p):
+                if not (l.p1.id in group_ids and l.p2.id in group_ids):
+                    sim.scene.remove_link(l)
+
+class set_thrust():
+    def __init__(self, thrust, active):
+        self.thrust = thrust
+        self.active = active
+
+    def apply(self, sim):
+        # with a cluster, a new engine gets an actuator of its own
+        if not self.thrust in sim.thrusts:
+            if sim.cluster:
+                sim.cluster.add_engine(self.thrust)
+            else:
+                sim.thrusts.append(self.thrust)
+
+        self.thrust.set_active(self.active)
+
+class retarget_tvc():
+    def __init__(self, thrust):
+        self.thrust = thrust
+
+    def apply(self, sim):
+        sim.controller.set_thrust(self.thrust)
+
+########################
+#       EVENTS         #
+########################
+
+class event():
+    # fires its actions once the channel's gauge reaches the trigger value
+    def __init__(self, name, channel, trigger, actions):
+        self.name = name
+        self.channel = channel
+        self.trigger = trigger
+        self.actions = actions
+
+    def fire(self, sim):
+        for a in self.actions:
+            a.apply(sim)
+
+class timeline():
+    # one min-heap of pending events per channel. a channel is a gauge of
+    # the flight (time, altitude, burn time...) and an event fires the
+    # first time its gauge reaches the trigger, so each step costs one
+    # gauge evaluation and one peek per channel no matter how many events
+    # are pending
+    def __init__(self):
+        self.gauges = {}
+        self.queues = {}
+        self.count = 0
+        self.log = []
+
+    def add_channel(self, name, gauge):
+        self.gauges[name] = gauge
+        self.queues.setdefault(name, [])
+
+    def schedule(self, ev):
+        if not ev.channel in self.gauges:
+            raise KeyError("Unknown event channel: " + str(ev.channel))
+
+        heapq.heappush(self.queues[ev.channel], (ev.trigger, self.count, ev))
+        self.count += 1
+        return ev
+
+    def get_pending(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def update(self, sim):
+        for name, queue in self.queues.items():
+            if not queue:
+                continue
+
+            value = self.gauges[name](sim)
+            while queue and queue[0][0] <= value:
+                ev = heapq.heappop(queue)[2]
+                ev.fire(sim)
+                self.log.append((sim.sim_time, ev.name))
@@ -0,0 +1,103 @@
+import bisect
+import math
+
+from atmosphere import *
+
+########################
+#    PITCH PROGRAM     #
+########################
+
+class pitch_program():
+    # target flight angle (deg) against altitude or time. between the
+    # breakpoints the angle follows a monotone cubic, so neither the
+    # commanded angle nor its rate jumps and the program never overshoots
+    # the angles it was given
+    def __init__(self, table, key="altitude"):
+        if not key in ("altitude", "time"):
+            raise ValueError("Pitch program key must be altitude or time, not " + str(key))
+        if not table:
+            raise ValueError("Pitch program needs at least one breakpoint")
+
+        table = sorted(table)
+        for i in range(len(table) - 1):
+            if table[i][0] == table[i + 1][0]:
+                raise ValueError("Pitch program has more than one angle at " + key + " " + str(table[i][0]))
+
+        self.key = key
+        self.xs = [row[0] for row in table]
+        self.angles = [row[1] for row in table]
+        self.slopes = monotone_slopes(self.xs, self.angles)
+
+    def get(self, x):
+        xs = self.xs
+        if x <= xs[0]:
+            return self.angles[0]
+        if x >= xs[-1]:
+            return self.angles[-1]
+
+        i = bisect.bisect_right(xs, x) - 1
+        h = xs[i + 1] - xs[i]
+        t = (x - xs[i]) / h
+        t2 = t * t
+        t3 = t2 * t
+
+        return ((2 * t3 - 3 * t2 + 1) * self.angles[i] + (t3 - 2 * t2 + t) * h * self.slopes[i] +
+                (-2 * t3 + 3 * t2) * self.angles[i + 1] + (t3 - t2) * h * self.slopes[i + 1])
+
+    def get_target_angle(self, altitude, time):
+        if self.key == "time":
+            return self.get(time)
+
+        return self.get(altitude)
+
+def monotone_slopes(xs, ys):
+    # Fritsch-Carlson tangents, zero at both ends of the table since the
+    # program is held constant outside of it
+    n = len(xs)
+    slopes = [0] * n
+    if n < 2:
+        return slopes
+
+    deltas = [(ys[i + 1] - ys[i]) / (xs[i + 1] - xs[i]) for i in range(n - 1)]
+
+    for i in range(1, n - 1):
+        if deltas[i - 1] * deltas[i] > 0:
+            slopes[i] = (deltas[i - 1] + deltas[i]) / 2
+
+    for i in range(n - 1):
+        if deltas[i] == 0:
+            slopes[i] = 0
+            slopes[i + 1] = 0
+            continue
+
+        alpha = slopes[i] / deltas[i]
+        beta = slopes[i + 1] / deltas[i]
+        if alpha ** 2 + beta ** 2 > 9:
+            tau = 3 / math.sqrt(alpha ** 2 + beta ** 2)
+            slopes[i] = tau * alpha * deltas[i]
+            slopes[i + 1] = tau * beta * deltas[i]
+
+    return slopes
+
+########################
+#       GRAVITY        #
+########################
+
+class inverse_square_gravity():
+    # gravitational acceleration magnitude against altitude, tabulated
+    # once so a lookup is a single interpolation
+    def __init__(self, g0=9.81, radius=6371000, max_alt=1000000, alt_step=500):
+        self.g0 = g0
+        self.radius = radius
+        self.max_alt = max_alt
+        self.alt_step = alt_step
+        self.table = tabulate(lambda h: g0 * (radius / (radius + h)) ** 2, 0, max_alt, alt_step)
+
+    def get(self, h):
+        return self.table.get(h)
+
+    def get_potential(self, h):
+        # potential energy per unit mass relative to the ground, exact
+        # rather than tabulated so the energy budget doesn't pick up
+        # interpolation error
+        return self.g0 * self.radius * h / (self.radius + h)
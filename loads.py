@@ -0,0 +1,73 @@
+########################
+#     LINK LOADS       #
+########################
+
+class load_monitor():
+    # runs right after the link forces, reusing the tension each link
+    # keeps from its own force evaluation, so a pass over all links is a
+    # few comparisons per link
+    def __init__(self, break_links=True, every=1):
+        self.break_links = break_links
+        self.every = every
+
+        # link id -> [name, peak tension, time, peak compression, time]
+        self.peaks = {}
+        # (time, link name, load, mode)
+        self.failures = []
+        self.failed = set()
+
+    def update(self, sim):
+        if sim.cycle % self.every:
+            return
+
+        t = sim.sim_time
+        peaks = self.peaks
+        overloaded = []
+
+        for l in sim.scene.links:
+            tension = l.tension
+
+            peak = peaks.get(l.id)
+            if peak is None:
+                peak = peaks[l.id] = [l.get_name(), 0, 0, 0, 0]
+
+            if tension > peak[1]:
+                peak[1] = tension
+                peak[2] = t
+                if tension > l.tension_limit:
+                    overloaded.append((l, tension, "tension"))
+            elif -tension > peak[3]:
+                peak[3] = -tension
+                peak[4] = t
+                if -tension > l.compression_limit:
+                    overloaded.append((l, tension, l.compression_mode))
+
+        for l, load, mode in overloaded:
+            if l.id in self.failed:
+                continue
+
+            self.failed.add(l.id)
+            self.failures.append((t, l.get_name(), load, mode))
+            if self.break_links:
+                sim.scene.remove_link(l)
+
+    def get_peak_loads(self, count=None):
+        # heaviest loaded links first, by the larger of their two peaks
+        rows = sorted(self.peaks.values(), key=lambda p: max(p[1], p[3]), reverse=True)
+        return rows[:count] if count else rows
+
+def format_failures(failures):
+    lines = []
+    for t, name, load, mode in failures:
+        lines.append("Link " + name + " failed in " + mode + " at " + ("%.3f" % t) + " s (" +
+                     ("%.4g" % abs(load)) + " N)")
+
+    return "\n".join(lines)
+
+def format_peak_loads(rows):
+    lines = ["link  peak tension (N)  at (s)  peak compression (N)  at (s)"]
+    for name, tension, t_tension, compression, t_compression in rows:
+        lines.append(name + "  " + ("%.4g" % tension) + "  " + ("%.3f" % t_tension) + "  " +
+                     ("%.4g" % compression) + "  " + ("%.3f" % t_compression))
+
+    return "\n".join(lines)
@@ -1,12 +1,20 @@
 from tkinter import *
+import sys
 import time
 
 from vector2 import *
+from physics import *
+from scene import *
+from sim import *
+from rocket import *
+from scenefile import *
+from record import *
 
-drag_coeff = 1E-8
-gravity = vec2(0, -9.81)  # m/s^2
 dt = 0
 
+canvas_width = 900
+canvas_height = 500
+
 ########################
 #       CAMERA         #
 ########################
@@ -34,7 +42,7 @@ class camera():
         self.pos += movement
 
     def do_zoom(self, zoom):
-        self.zoom *= zoom
+        self.zoom = min(max(self.zoom * zoom, min_cam_zoom), max_cam_zoom)
 
     def get_state(self):
         return self.state
@@ -45,6 +53,10 @@ class camera():
     def get_zoom(self):
         return self.zoom
 
+# meters per pixel
+min_cam_zoom = 1e-3
+max_cam_zoom = 1e4
+
 def get_active_cam():
     current_cam = None
 
@@ -78,284 +90,236 @@ def zoom_current_cam_out(event=None):
 def zoom_current_cam_in(event=None):
     get_active_cam().do_zoom(0.5)
 
-########################
-#       GROUND         #
-########################
-
-class ground():
-    def __init__(self, height, color, elasticity, k):
-        self.height = height
-        self.color = color
-        self.elasticity = elasticity
-        self.k = k
-
-    def get_height(self):
-        return self.height
-
-    def get_color(self):
-        return self.color
-
-    def apply_force(self, points):
-        for p in points:
-            # normal force
-            if p.get_pos().y < self.height:
-                p.apply_force(vec2(0, p.mass * p.vel.y * -1 * (self.elasticity + 1) / dt))
-                p.apply_force(gravity * p.mass)
-                p.pos.y = self.height
-
-            # friction
-            if p.get_pos().y <= self.height:
-                p.apply_force(vec2(p.vel.x, 0).normalized() * -1 * p.mass * gravity.mag() * self.k)
-
-########################
-#       LINK           #
-########################
-
-class rigid_link():
-    def __init__(self, name, p1, p2, color, k=1000, b=0):
-        self.name = name
-        self.p1 = p1
-        self.p2 = p2
-        self.dist = get_dist_between(p1, p2)
-        # spring coefficient
-        self.k = k
-        self.b = b
-        self.color = color
-
-    def get_k(self):
-        return self.k
-
-    def get_name(self):
-        return self.name
-
-    def get_color(self):
-        return self.color
-
-    def apply_force(self):
-        if get_dist_between(self.p1, self.p2) > self.dist:
-            self.p1.apply_force(
-                self.p1.get_unit_vector_towards(self.p2) * self.k * abs(get_dist_between(self.p1, self.p2) - self.dist))
-            self.p2.apply_force(
-                self.p2.get_unit_vector_towards(self.p1) * self.k * abs(get_dist_between(self.p1, self.p2) - self.dist))
-
-        elif get_dist_between(self.p1, self.p2) < self.dist:
-            self.p1.apply_force(self.p1.get_unit_vector_towards(self.p2) * -self.k * abs(
-                get_dist_between(self.p1, self.p2) - self.dist))
-            self.p2.apply_force(self.p2.get_unit_vector_towards(self.p1) * -self.k * abs(
-                get_dist_between(self.p1, self.p2) - self.dist))
-
-        # damping
-        if not self.b == 0:
-            rel_outvel = (self.p2.vel - self.p1.vel) - (self.p2.pos - self.p1.pos) * (self.p2.vel - self.p1.vel).dot((self.p2.pos - self.p1.pos).normalized())
-            self.p2.apply_force(self.p2.get_unit_vector_towards(self.p1) * rel_outvel.mag() * self.b)
-            self.p1.apply_force(self.p2.get_unit_vector_towards(self.p1) * rel_outvel.mag() * -self.b)
-
-    def get_midpoint(self):
-        return (self.p1.get_pos() + self.p2.get_pos()) / 2
-
-########################
-#     POINT MASS       #
-########################
-
-class point():
-    def __init__(self, name, pos, vel, color, mass=1, static=False):
-        self.name = name
-        self.pos = pos
-        self.vel = vel
-        self.accel = vec2()
-        self.mass = mass
-        self.static = static
-        self.color = color
-
-        self.limit_axis = None
-
-    def get_name(self):
-        return self.name
-
-    def get_pos(self):
-        return self.pos
-
-    def get_vel(self):
-        return self.vel
-
-    def get_mass(self):
-        return self.mass
-
-    def get_color(self):
-        return self.color
-
-    def get_unit_vector_towards(self, p2):
-        return (p2.pos - self.pos) / (p2.pos - self.pos).mag()
-
-    def get_vector_towards(self, p2):
-        if type(p2) is point:
-            return p2.pos - self.pos
-        else:
-            return p2 - self.pos
-
-    def clear_accel(self):
-        # call this every tick to not have residual forces from
-        # previous frame
-        self.accel = vec2(0, 0)
-
-    def apply_force(self, force):
-        self.accel += force / self.mass
-
-    def apply_gravity(self):
-        self.apply_force(gravity * self.mass)
-
-    def apply_drag(self):
-        self.apply_force((self.vel.normalized() * -1) * (self.vel.mag() ** 2) * drag_coeff)
+def space2canvas(space_coords):
+    current_cam = get_active_cam()
 
-    def update_vel(self):
-        if not self.static:
-            self.vel += self.accel * dt
+    canvas_x = ((space_coords.x - current_cam.get_pos().x) / current_cam.get_zoom() + canvas_width / 2)
+    canvas_y = ((-space_coords.y + current_cam.get_pos().y) / current_cam.get_zoom() + canvas_height / 2)
+    return vec2(canvas_x, canvas_y)
 
-        if self.limit_axis:
-            self.vel = self.limit_axis * self.vel.dot(self.limit_axis)
+def canvas2space(canvas_coords):
+    current_cam = get_active_cam()
 
-    def update_pos(self):
-        if not self.static:
-            self.pos += self.vel * dt
+    space_x = (canvas_coords.x - canvas_width / 2) * current_cam.get_zoom() + current_cam.get_pos().x
+    space_y = -((canvas_coords.y - canvas_height / 2) * current_cam.get_zoom() - current_cam.get_pos().y)
 
-    def set_limit_axis(self, vec):
-        if vec == "x":
-            self.limit_axis = vec2(1, 0)
-        elif vec == "y":
-            self.limit_axis = vec2(0, 1)
-        else:
-            self.limit_axis = vec.normalized()
+    return vec2(space_x, space_y)
 
 ########################
-#    CONSTANT FORCE    #
+#      VIEWPORT        #
 ########################
 
-class const_force():
-    def __init__(self, name, point, force):
-        self.name = name
-        self.point = point
-        self.force = force
-
-    def apply(self):
-        self.point.apply_force(self.force)
-
-def get_dist_between(p1, p2):
-    if (type(p1) is point) and (type(p2) is point):
-        return (p1.pos - p2.pos).mag()
-    elif (type(p1) is point) and not (type(p2) is point):
-        return (p1.pos - p2).mag()
-    elif not (type(p1) is point) and (type(p2) is point):
-        return (p1 - p2.pos).mag()
-    else:
-        return (p1 - p2).mag()
-
-class propellant:
-    def __init__(self, name, pos, vel, color, mass=1):
-        self.name = name
-        self.pos = pos
-        self.vel = vel
-        self.accel = vec2()
-        self.mass = mass
-        self.color = color
-
-        self.limit_axis = None
-
-    def get_name(self):
-        return self.name
-
-    def get_pos(self):
-        return self.pos
-
-    def get_vel(self):
-        return self.vel
-
-    def get_mass(self):
-        return self.mass
-
-    def get_color(self):
-        return self.color
-
-    def get_unit_vector_towards(self, p2):
-        return (p2.pos - self.pos) / (p2.pos - self.pos).mag()
-
-    def get_vector_towards(self, p2):
-        if type(p2) is point:
-            return p2.pos - self.pos
-        else:
-            return p2 - self.pos
-
-    def clear_accel(self):
-        # call this every tick to not have residual forces from
-        # previous frame
-        self.accel = vec2(0, 0)
-
-    def apply_force(self, force):
-        self.accel += force / self.mass
-
-    def apply_gravity(self):
-        self.apply_force(gravity * self.mass)
-
-    def apply_drag(self):
-        self.apply_force((self.vel.normalized() * -1) * (self.vel.mag() ** 2) * drag_coeff)
-
-    def update_vel(self):
-        self.vel += self.accel * dt
-
-        if self.limit_axis:
-            self.vel = self.limit_axis * self.vel.dot(self.limit_axis)
-
-    def update_pos(self):
-        self.pos += self.vel * dt
-
-    def set_limit_axis(self, vec):
-        if vec == "x":
-            self.limit_axis = vec2(1, 0)
-        elif vec == "y":
-            self.limit_axis = vec2(0, 1)
-        else:
-            self.limit_axis = vec.normalized()
+class viewport():
+    # keeps the cost of drawing a frame bounded: anything outside the
+    # canvas is culled, elements that collapse into the same pixel are
+    # drawn once, labels are thinned out and the total number of canvas
+    # items created per frame is capped
+    def __init__(self, width, height, max_items=4000, max_labels=150,
+                 label_cell=vec2(60, 16), min_grid_spacing=5):
+        self.width = width
+        self.height = height
+        self.max_items = max_items
+        self.max_labels = max_labels
+        self.label_cell = label_cell
+        self.min_grid_spacing = min_grid_spacing
+
+        self.cam_pos = vec2()
+        self.zoom = 1
+        self.min_x = self.max_x = self.min_y = self.max_y = 0
+        self.items = 0
+        self.labels = 0
+        self.skipped = 0
+        self.filled_cells = set()
+        self.label_cells = set()
+
+    def begin_frame(self, cam):
+        self.cam_pos = cam.get_pos()
+        self.zoom = cam.get_zoom()
+
+        # space coordinates of the visible area
+        half_w = self.width / 2 * self.zoom
+        half_h = self.height / 2 * self.zoom
+        self.min_x = self.cam_pos.x - half_w
+        self.max_x = self.cam_pos.x + half_w
+        self.min_y = self.cam_pos.y - half_h
+        self.max_y = self.cam_pos.y + half_h
+
+        self.items = 0
+        self.labels = 0
+        self.skipped = 0
+        self.filled_cells = set()
+        self.label_cells = set()
+
+    def to_canvas(self, pos):
+        return ((pos.x - self.cam_pos.x) / self.zoom + self.width / 2,
+                (self.cam_pos.y - pos.y) / self.zoom + self.height / 2)
+
+    def is_visible(self, pos):
+        return self.min_x <= pos.x <= self.max_x and self.min_y <= pos.y <= self.max_y
+
+    def segment_visible(self, a, b):
+        return not (max(a.x, b.x) < self.min_x or min(a.x, b.x) > self.max_x or
+                    max(a.y, b.y) < self.min_y or min(a.y, b.y) > self.max_y)
+
+    def take_item(self):
+        if self.items >= self.max_items:
+            self.skipped += 1
+            return False
+
+        self.items += 1
+        return True
+
+    def take_cell(self, x, y, color, size=1):
+        # True if nothing of this color has been drawn in this cell yet
+        cell = (int(x // size), int(y // size), color)
+        if cell in self.filled_cells:
+            return False
+
+        self.filled_cells.add(cell)
+        return True
+
+    def draw_link(self, link):
+        if not self.segment_visible(link.p1.pos, link.p2.pos):
+            return
+
+        x1, y1 = self.to_canvas(link.p1.pos)
+        x2, y2 = self.to_canvas(link.p2.pos)
+        color = link.get_color()
+
+        # sub-pixel links get merged into one stroke per pixel
+        if abs(x2 - x1) < 1 and abs(y2 - y1) < 1:
+            if self.take_cell(x1, y1, color) and self.take_item():
+                tk_canvas.create_line(x1, y1, x1 + 1, y1, fill=color)
+            return
+
+        if self.take_item():
+            tk_canvas.create_line(x1, y1, x2, y2, fill=color)
+
+    def draw_point(self, p):
+        if not self.is_visible(p.pos):
+            return
+
+        x, y = self.to_canvas(p.pos)
+        color = p.get_color()
+
+        # point ovals are 2 px across, anything closer than that overlaps
+        if self.take_cell(x, y, color, 2) and self.take_item():
+            tk_canvas.create_oval(x - 1, y - 1, x + 1, y + 1, fill=color)
+
+    def draw_label(self, pos, text, color="black", offset=vec2()):
+        if not self.is_visible(pos) or self.labels >= self.max_labels:
+            return
+
+        x, y = self.to_canvas(pos)
+        x += offset.x
+        y += offset.y
+
+        # one label per label-sized cell, dense clusters stay readable
+        cell = (int(x // self.label_cell.x), int(y // self.label_cell.y))
+        if cell in self.label_cells:
+            return
+
+        self.label_cells.add(cell)
+        if self.take_item():
+            self.labels += 1
+            tk_canvas.create_text(x, y, text=text, fill=color)
+
+    def draw_grid(self, spacing, count):
+        # spacing in meters, skipped entirely once lines would blur together
+        px_spacing = spacing / self.zoom
+        if px_spacing < self.min_grid_spacing:
+            return
+
+        uphundred_x = int(math.ceil(self.cam_pos.x / 100.0)) * 100 + 50
+        uphundred_y = int(math.ceil(self.cam_pos.y / 100.0)) * 100 - 150
+        ux, uy = self.to_canvas(vec2(uphundred_x, uphundred_y))
+
+        for i in range(count):
+            x = ux - px_spacing * i
+            if 0 <= x <= self.width and self.take_item():
+                tk_canvas.create_line(x, 0, x, self.height)
+
+        for i in range(count):
+            y = uy - px_spacing * i
+            if 0 <= y <= self.height and self.take_item():
+                tk_canvas.create_line(0, y, self.width, y)
 
 ########################
-#        THRUST        #
+#       REPLAY         #
 ########################
 
-class thrust:
-    def __init__(self, magnitude, origin, p2, offset, offset_rate):
-        self.magnitude = magnitude
-        self.origin = origin
-        self.p2 = p2
-        self.offset = offset
-        self.direction = self.origin.get_unit_vector_towards(self.p2)
-        self.offset_rate = offset_rate
-
-    def move_towards_offset(self, target, dt):
-        if target > self.offset and target > self.offset + self.offset_rate * dt:
-            self.offset += self.offset_rate * dt
-        elif target < self.offset and target < self.offset - self.offset_rate * dt:
-            self.offset -= self.offset_rate * dt
-        elif (target > self.offset and target < self.offset + self.offset_rate * dt) or (target < self.offset and target > self.offset - self.offset_rate * dt):
-            self.offset = target
-
-    def apply_force(self):
-        self.direction = self.origin.get_unit_vector_towards(self.p2)
-        self.direction = self.direction.rotated(math.radians(self.offset))
-        force = self.direction * self.magnitude
-        self.origin.apply_force(force)
-
-def space2canvas(space_coords):
-    current_cam = get_active_cam()
-
-    canvas_x = ((space_coords.x - current_cam.get_pos().x) / current_cam.get_zoom() + 900 / 2)
-    canvas_y = ((-space_coords.y + current_cam.get_pos().y) / current_cam.get_zoom() + 500 / 2)
-    return vec2(canvas_x, canvas_y)
-
-def canvas2space(canvas_coords):
-    current_cam = get_active_cam()
-
-    space_x = (canvas_coords.x - 900 / 2) * current_cam.get_zoom() + current_cam.get_pos().x
-    space_y = -((canvas_coords.y - 500 / 2) * current_cam.get_zoom() - current_cam.get_pos().y)
-
-    return vec2(space_x, space_y)
+class replay():
+    # plays a recording back instead of simulating. the scene stored in
+    # the recording provides the points and links to draw, each frame
+    # only moves them, and frames are read from disk as they are needed
+    def __init__(self, path):
+        self.rec = recording(path)
+        if not self.rec.frame_count:
+            raise ValueError(path + " has no frames, the run was shorter than its recording interval")
+
+        self.sim = simulation_from_dict(self.rec.header["scene"])
+        self.points = list(self.sim.scene.points)
+        # links broken during the run are taken out and put back as the
+        # playback passes the frame they broke at
+        self.links = list(self.sim.scene.links)
+        self.removed = set()
+
+        self.start_time = self.rec.get_frame_time(0)
+        self.end_time = self.rec.get_frame_time(self.rec.frame_count - 1)
+        self.time = self.start_time
+        self.speed = 1
+        self.playing = True
+        self.frame = None
+        self.last_wall = time.perf_counter()
+
+        self.load_frame(0)
+
+    def toggle(self):
+        self.playing = not self.playing
+
+    def set_speed(self, speed):
+        self.speed = speed
+
+    def seek(self, t):
+        self.time = min(max(t, self.start_time), self.end_time)
+
+    def update(self):
+        now = time.perf_counter()
+        if self.playing:
+            self.seek(self.time + (now - self.last_wall) * self.speed)
+        self.last_wall = now
+
+        i = self.rec.find_frame(self.time, self.frame)
+        if i != self.frame:
+            self.load_frame(i)
+
+    def load_frame(self, i):
+        frame = self.rec.read_frame(i)
+        self.frame = i
+
+        self.sim.sim_time = frame[0]
+        c = self.sim.controller
+        c.target_offset = frame[1]
+        c.current_angle = frame[2]
+        c.desired_flight_angle = frame[3]
+
+        for k, t in enumerate(self.sim.thrusts):
+            t.offset = frame[frame_head + k]
+
+        removed = self.rec.get_removed_links(i)
+        for k in removed - self.removed:
+            self.sim.scene.remove_link(self.links[k])
+        for k in self.removed - removed:
+            self.sim.scene.add_link(self.links[k])
+        self.removed = removed
+
+        slot = frame_head + len(self.sim.thrusts)
+        for p in self.points:
+            p.pos = vec2(frame[slot], frame[slot + 1])
+            slot += 2
+
+        for t in self.sim.thrusts:
+            t.direction = t.origin.get_unit_vector_towards(t.p2).rotated(math.radians(t.offset))
 
 def sign(number):
     if number >= 0:
@@ -440,16 +404,13 @@ def apply_force_with_mouse(x, y, click):
             force_buffer = []
 
 def create_force(x, y, point):
-    global forces
-    forces.append(const_force(name_field.get("1.0", "end-1c"), point, point.get_vector_towards(vec2(x, y)) * 0.01))
+    current_scene.add_force(const_force(name_field.get("1.0", "end-1c"), point, point.get_vector_towards(vec2(x, y)) * 0.01))
 
 def delete_force(x, y):
-    global forces
     force_tbd = get_closest_force_to_coords(x, y)
 
     if force_tbd:
-        forces.remove(force_tbd)
-        del force_tbd
+        current_scene.remove_force(force_tbd)
 
 def create_link(x, y):
     global linking_buffer
@@ -461,7 +422,7 @@ def create_link(x, y):
             linking_buffer.append(get_closest_point_to_coords(x, y))
             new_link = rigid_link(name_field.get("1.0", "end-1c"), linking_buffer[0], linking_buffer[1],
                                   link_color_field.get("1.0", "end-1c"), float(link_const_field.get("1.0", "end-1c")))
-            links.append(new_link)
+            current_scene.add_link(new_link)
 
         linking_buffer = []
 
@@ -469,12 +430,13 @@ def delete_link(x, y):
     link_tbd = get_closest_link_to_coords(x, y)
 
     if link_tbd:
-        links.remove(link_tbd)
-        del link_tbd
+        current_scene.remove_link(link_tbd)
 
 def toggle_pause():
     global dt
-    if dt > 0:
+    if player:
+        player.toggle()
+    elif dt > 0:
         dt = 0
     else:
         dt = 0.001
@@ -507,22 +469,19 @@ def get_closest_force_to_coords(x, y):
 def create_point(x, y):
     new_point = point(name_field.get("1.0", "end-1c"), vec2(x, y), vec2(), "seagreen",
                       float(point_mass_field.get("1.0", "end-1c")), staticPoint.get())
-    points.append(new_point)
+    current_scene.add_point(new_point)
 
 def delete_point(x, y):
     point_tbd = get_closest_point_to_coords(x, y)
 
     if point_tbd:
 
-        # if point is an end of a link, delete the link
-        # as well
-        for l in links:
-            if l.p1 == point_tbd or l.p2 == point_tbd:
-                links.remove(l)
-                del l
+        # links and forces attached to the point go with it
+        current_scene.remove_point(point_tbd)
 
-        points.remove(point_tbd)
-        del point_tbd
+        for buffer in (force_buffer, linking_buffer, calc_com_buffer):
+            if point_tbd in buffer:
+                buffer.remove(point_tbd)
 
 root = Tk()
 root.title("Mechuilibria SloshTVC")
@@ -565,10 +524,11 @@ link_label_type_k.grid(row=6, column=0)
 pauseResumeButton = Button(root, text="Pause/Resume", command=toggle_pause)
 pauseResumeButton.grid(row=7, column=0)
 
-tk_canvas = Canvas(root, width=900, height=500, bg="white")
+tk_canvas = Canvas(root, width=canvas_width, height=canvas_height, bg="white")
 tk_canvas.grid(row=0, column=1, rowspan=15, columnspan=5)
 
 main_cam = camera("main_cam", vec2(100, 50), 1, "active")
+view = viewport(canvas_width, canvas_height)
 
 # canvas click
 click_op = StringVar(root, "cp")
@@ -637,131 +597,67 @@ root.bind("<Control_L>", zoom_current_cam_out)
 root.bind("<Shift_L>", zoom_current_cam_in)
 
 # rocket
-K_gimbal = 35
-K_angvel = 1e-2
-max_target_angvel = 0.5
-K_orient = 1
-
-rocket_mass = 500
-payload_mass = 20
-rocket_length = 70
-rocket_rigidity = 15e6
-rocket_damping = 1e-4
-pt_mass = rocket_mass / 14
-propellant_mass = 5000
-propellant_bumparoundability = 15e4
-propellant_sloshcosity = 50
-
-p00 = point("p00", vec2(-2, 0), vec2(), "seagreen", pt_mass)
-p01 = point("p01", vec2(-2, 15), vec2(), "seagreen", pt_mass)
-p02 = point("p02", vec2(-2, 40), vec2(), "seagreen", pt_mass)
-p03 = point("p03", vec2(-2, 50), vec2(), "seagreen", pt_mass)
-p04 = point("p04", vec2(-2, 60), vec2(), "seagreen", pt_mass)
-p05 = point("p05", vec2(-2, 65), vec2(), "seagreen", pt_mass)
-
-p20 = point("p20", vec2(2, 0), vec2(), "seagreen", pt_mass)
-p21 = point("p21", vec2(2, 15), vec2(), "seagreen", pt_mass)
-p22 = point("p22", vec2(2, 40), vec2(), "seagreen", pt_mass)
-p23 = point("p23", vec2(2, 50), vec2(), "seagreen", pt_mass)
-p24 = point("p24", vec2(2, 60), vec2(), "seagreen", pt_mass)
-p25 = point("p25", vec2(2, 65), vec2(), "seagreen", pt_mass)
-
-p10 = point("p10", vec2(0, 7), vec2(), "seagreen", propellant_mass * 0.3)
-p11 = point("p11", vec2(0, 40-13), vec2(), "seagreen", propellant_mass * 0.4)
-p12 = point("p12", vec2(0, 45), vec2(), "seagreen", propellant_mass * 0.1)
-p13 = point("p13", vec2(0, 55), vec2(), "seagreen", propellant_mass * 0.2)
-p14 = point("p14", vec2(0, 65), vec2(), "seagreen", payload_mass)
-p15 = point("p15", vec2(0, 70), vec2(), "seagreen", pt_mass)
-
-pt = point("pt", vec2(0,0), vec2(), "seagreen", pt_mass)
-
-s01 = rigid_link("s0", p00, pt, "skyblue", rocket_rigidity, rocket_damping)
-s02 = rigid_link("s0", p20, pt, "skyblue", rocket_rigidity, rocket_damping)
-s03 = rigid_link("s0", p01, pt, "skyblue", rocket_rigidity, rocket_damping)
-s04 = rigid_link("s0", p21, pt, "skyblue", rocket_rigidity, rocket_damping)
-s1 = rigid_link("s1", p01, p21, "skyblue", rocket_rigidity, rocket_damping)
-s2 = rigid_link("s2", p02, p22, "skyblue", rocket_rigidity, rocket_damping)
-s3 = rigid_link("s3", p03, p23, "skyblue", rocket_rigidity, rocket_damping)
-s4 = rigid_link("s4", p04, p24, "skyblue", rocket_rigidity, rocket_damping)
-
-v1 = rigid_link("v1", p00, p01, "skyblue", rocket_rigidity, rocket_damping)
-v2 = rigid_link("v2", p01, p02, "skyblue", rocket_rigidity, rocket_damping)
-v3 = rigid_link("v3", p02, p03, "skyblue", rocket_rigidity, rocket_damping)
-v4 = rigid_link("v4", p03, p04, "skyblue", rocket_rigidity, rocket_damping)
-v5 = rigid_link("v5", p04, p05, "skyblue", rocket_rigidity, rocket_damping)
-v6 = rigid_link("v6", p20, p21, "skyblue", rocket_rigidity, rocket_damping)
-v7 = rigid_link("v7", p21, p22, "skyblue", rocket_rigidity, rocket_damping)
-v8 = rigid_link("v8", p22, p23, "skyblue", rocket_rigidity, rocket_damping)
-v9 = rigid_link("v9", p23, p24, "skyblue", rocket_rigidity, rocket_damping)
-v10 = rigid_link("v10", p24, p25, "skyblue", rocket_rigidity, rocket_damping)
-
-tip1 = rigid_link("tip1", p05, p15, "skyblue", rocket_rigidity, rocket_damping)
-tip2 = rigid_link("tip2", p15, p25, "skyblue", rocket_rigidity, rocket_damping)
-tip3 = rigid_link("tip3", p05, p25, "skyblue", rocket_rigidity, rocket_damping)
-
-adapter1 = rigid_link("adapter1", p04, p14, "skyblue", rocket_rigidity, rocket_damping)
-adapter2 = rigid_link("adapter1", p24, p14, "skyblue", rocket_rigidity, rocket_damping)
-
-c1 = rigid_link("c1", p00, p21, "skyblue", rocket_rigidity, rocket_damping)
-c2 = rigid_link("c2", p01, p22, "skyblue", rocket_rigidity, rocket_damping)
-c3 = rigid_link("c3", p02, p23, "skyblue", rocket_rigidity, rocket_damping)
-c4 = rigid_link("c4", p03, p24, "skyblue", rocket_rigidity, rocket_damping)
-c5 = rigid_link("c1", p04, p25, "skyblue", rocket_rigidity, rocket_damping)
-
-c6 = rigid_link("c6", p01, p20, "skyblue", rocket_rigidity, rocket_damping)
-c7 = rigid_link("c7", p02, p21, "skyblue", rocket_rigidity, rocket_damping)
-c8 = rigid_link("c8", p03, p22, "skyblue", rocket_rigidity, rocket_damping)
-c9 = rigid_link("c9", p04, p23, "skyblue", rocket_rigidity, rocket_damping)
-c10 = rigid_link("c10", p05, p24, "skyblue", rocket_rigidity, rocket_damping)
-
-pl01 = rigid_link("pl01", p00, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl02 = rigid_link("pl02", p20, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl03 = rigid_link("pl03", p21, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl04 = rigid_link("pl04", p01, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
-
-pl11 = rigid_link("pl11", p01, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl12 = rigid_link("pl12", p21, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl13 = rigid_link("pl13", p22, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl14 = rigid_link("pl14", p02, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
-
-pl21 = rigid_link("pl21", p02, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl22 = rigid_link("pl22", p22, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl23 = rigid_link("pl23", p23, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl24 = rigid_link("pl24", p03, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
-
-pl31 = rigid_link("pl31", p03, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl32 = rigid_link("pl32", p23, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl33 = rigid_link("pl33", p24, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
-pl34 = rigid_link("pl34", p04, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
-
-f1 = thrust((rocket_mass + propellant_mass) * 30, pt, p15, 0, 25)
+# a scene file or a recording to play back can be given on the command line
+player = None
+if len(sys.argv) > 1 and sys.argv[1].endswith(".rec"):
+    try:
+        player = replay(sys.argv[1])
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    sim = player.sim
+elif len(sys.argv) > 1:
+    sim = load_scene(sys.argv[1])
+else:
+    sim = build_rocket()
+
+def scrub(event=None):
+    player.seek(scrub_bar.get())
+
+def change_replay_speed(factor):
+    player.set_speed(player.speed * factor)
+    replay_speed.set("Speed: " + str(player.speed) + "x")
+
+def jump_to_time():
+    try:
+        player.seek(float(jump_field.get("1.0", "end-1c")))
+    except ValueError:
+        pass
+
+if player:
+    replay_label = Label(root, text="Replay")
+    replay_label.grid(row=20, column=0)
+
+    scrub_bar = Scale(root, from_=player.start_time, to=player.end_time, resolution=0.001,
+                      orient=HORIZONTAL, length=600, showvalue=0)
+    scrub_bar.grid(row=20, column=1, columnspan=4)
+    scrub_bar.bind("<B1-Motion>", scrub)
+    scrub_bar.bind("<ButtonRelease-1>", scrub)
+
+    replay_speed = StringVar(root, "Speed: 1x")
+    Label(root, textvariable=replay_speed).grid(row=21, column=0)
+    Button(root, text="Slower", command=lambda: change_replay_speed(0.5)).grid(row=21, column=1)
+    Button(root, text="Faster", command=lambda: change_replay_speed(2)).grid(row=21, column=2)
+    Button(root, text="Reverse", command=lambda: change_replay_speed(-1)).grid(row=21, column=3)
+
+    jump_field = Text(root, height=1, width=10)
+    jump_field.grid(row=22, column=1)
+    Button(root, text="Jump to time (s)", command=jump_to_time).grid(row=22, column=2)
 
 cameras = [main_cam]
 main_cam.do_zoom(0.2)
 
-floor = ground(-100, "green", 0.5, 0.8)
-points = [p00, p01, p02, p03, p04, p05,
-          p10, p11, p12, p13, p14, p15,
-          p20, p21, p22, p23, p24, p25,
-          pt]
-
-links = [s01, s02, s03, s04,
-         s1, s2, s3, s4,
-         v1, v2, v3, v4, v5, v6, v7, v8, v9, v10,
-         tip1, tip2, tip3,
-         adapter1, adapter2,
-         c1, c2, c3, c4, c5, c6, c7, c8, c9, c10,
-         pl01, pl02, pl03, pl04,
-         pl11, pl12, pl13, pl14,
-         pl21, pl22, pl23, pl24,
-         pl31, pl32, pl33, pl34]
-forces = []
-thrusts = [f1]
+floor = sim.floor
+current_scene = sim.scene
+points = current_scene.points
+links = current_scene.links
+forces = current_scene.forces
 force_buffer = []
 linking_buffer = []
 calc_com_buffer = []
-sim_time = 0
-cycle = 0
+# the scene is drawn once per batch of steps, so the number of canvas
+# items made for each frame on screen stays within the draw limit
+steps_per_frame = 10
 
 while True:
 
@@ -780,12 +676,18 @@ while True:
     elif click_op.get() == "cm":
         instruction.set("Left click to choose\nmasses to calculate\ncenter of mass. Right\nclick to remove mass.")
 
-    if not dt == 0:
-        floor.apply_force(points)
+    view.begin_frame(get_active_cam())
 
-    if space2canvas(vec2(0, floor.get_height())).y < 500:
+    if player:
+        player.update()
+        scrub_bar.set(player.time)
+    elif not dt == 0:
+        for i in range(steps_per_frame):
+            sim.step(dt)
+
+    if space2canvas(vec2(0, floor.get_height())).y < canvas_height:
         tk_canvas.create_rectangle(-1000, space2canvas(vec2(0, floor.get_height())).y,
-                                    1000, 500,
+                                    1000, canvas_height,
                                     fill=floor.get_color())
 
     for f in forces:
@@ -793,64 +695,8 @@ while True:
                               space2canvas(vec2(f.point.get_pos().x + f.force.x * 100, f.point.get_pos().y)).x,
                               space2canvas(vec2(f.point.get_pos().x, f.point.get_pos().y + f.force.y * 100)).y,
                               fill="blue", arrow=LAST)
-        f.apply()
-
-    # TVC
-    t = f1
-
-    if t.origin.pos.y < 500:
-        desired_flight_angle = 10
-    elif t.origin.pos.y < 1500:
-        desired_flight_angle = 25
-    elif t.origin.pos.y < 5000:
-        desired_flight_angle = 45
-    else:
-        desired_flight_angle = 60
-
-    tip_rvel = t.p2.vel - t.origin.vel
-    tip_rpos = t.p2.pos - t.origin.pos
-    ang_vel = tip_rvel - tip_rpos.normalized() * tip_rvel.dot(tip_rpos.normalized())
-    if ang_vel.x > 0:
-        if ang_vel.y < 0:
-            angvels = ang_vel.mag() / rocket_length
-        else:
-            angvels = -ang_vel.mag() / rocket_length
-    else:
-        if ang_vel.y < 0:
-            angvels = ang_vel.mag() / rocket_length
-        else:
-            angvels = -ang_vel.mag() / rocket_length
-
-    desired_dir = vec2(0, 1).rotated(math.radians(desired_flight_angle)).normalized()
-    current_dir = (t.p2.pos - t.origin.pos).normalized()
-    current_angle = -math.atan2((t.p2.pos - t.origin.pos).x, (t.p2.pos - t.origin.pos).y)
-    correction = (desired_dir - current_dir).normalized()
-    # correction_mag = (desired_dir - current_dir).mag()
-
-    correction_mag = desired_flight_angle - math.degrees(current_angle)
 
-    if correction.x > 0:
-        if correction.y > 0:
-            target_angvel = -K_angvel * correction_mag
-        else:
-            target_angvel = K_angvel * correction_mag
-    else:
-        if correction.y > 0:
-            target_angvel = -K_angvel * correction_mag
-        else:
-            target_angvel = K_angvel * correction_mag
-
-    if target_angvel < -max_target_angvel:
-        target_angvel = -max_target_angvel
-    elif target_angvel > max_target_angvel:
-        target_angvel = max_target_angvel
-
-    angvel_error = (angvels - target_angvel) * K_orient
-    target_offset = angvel_error * K_gimbal
-
-    t.move_towards_offset(target_offset, dt)
-
-    for t in thrusts:
+    for t in sim.thrusts:
         ox = space2canvas(t.origin.pos).x
         oy = space2canvas(t.origin.pos).y
         p = t.origin.pos - t.direction * t.magnitude * 0.0005 * main_cam.get_zoom()
@@ -861,7 +707,6 @@ while True:
         ny = space2canvas(n).y
         tk_canvas.create_line(ox, oy, px, py, fill="blue", arrow=FIRST)
         tk_canvas.create_line(ox, oy, nx, ny, fill="red", dash=True)
-        t.apply_force()
 
     for p in force_buffer:
         tk_canvas.create_oval(space2canvas(p.get_pos()).x - 5, space2canvas(p.get_pos()).y - 5,
@@ -888,77 +733,52 @@ while True:
                               space2canvas(com_pos).x + 8, space2canvas(com_pos).y - 8,
                               fill="#ffc100")
 
-    cam_pos = main_cam.pos
-    uphundred_x = int(math.ceil(cam_pos.x / 100.0)) * 100 + 50
-    uphundred_y = int(math.ceil(cam_pos.y / 100.0)) * 100 - 150
-    uphundred = vec2(uphundred_x, uphundred_y)
-    for i in range(20):
-        tk_canvas.create_line(space2canvas(uphundred).x - 20 / main_cam.get_zoom() * i, 0,
-                              space2canvas(uphundred).x - 20 / main_cam.get_zoom() * i, 500)
-
-    for i in range(20):
-        tk_canvas.create_line(0, space2canvas(uphundred).y - 20 / main_cam.get_zoom() * i,
-                              900, space2canvas(uphundred).y - 20 / main_cam.get_zoom() * i)
+    view.draw_grid(20, 20)
 
     for link in links:
-        if not dt == 0:
-            link.apply_force()
-        tk_canvas.create_line(space2canvas(link.p1.get_pos()).x, space2canvas(link.p1.get_pos()).y,
-                              space2canvas(link.p2.get_pos()).x, space2canvas(link.p2.get_pos()).y,
-                              fill=link.get_color())
+        view.draw_link(link)
 
     for p in points:
-        tk_canvas.create_oval(space2canvas(p.get_pos()).x - 1, space2canvas(p.get_pos()).y - 1,
-                              space2canvas(p.get_pos()).x + 1, space2canvas(p.get_pos()).y + 1,
-                              fill=p.get_color())
+        view.draw_point(p)
 
-        if not dt == 0:
-            p.apply_gravity()
-            p.apply_drag()
-            p.update_vel()
-            p.update_pos()
+    controller = sim.controller
+    desired_flight_angle = controller.desired_flight_angle
+    current_angle = controller.current_angle
+    target_angvel = controller.target_angvel
+    angvels = controller.angvels
+    target_offset = controller.target_offset
 
     tk_canvas.create_text(100, 15, text="Target flight angle: " + str(desired_flight_angle))
     tk_canvas.create_text(100, 30, text="Current flight angle: " + str(round(math.degrees(current_angle), 2)))
     tk_canvas.create_text(100, 45, text="Target angular velocity: " + str(round(target_angvel, 2)))
     tk_canvas.create_text(100, 60, text="Current angular velocity: " + str(round(angvels, 2)))
     tk_canvas.create_text(100, 75, text="Thruster gimbal target: " + str(round(target_offset, 2)))
-    tk_canvas.create_text(100, 90, text="Current thruster gimbal: " + str(round(f1.offset, 2)))
-    tk_canvas.create_text(100, 105, text="Time: " + str(round(sim_time, 2)))
+    tk_canvas.create_text(100, 90, text="Current thruster gimbal: " + str(round(controller.thrust.offset, 2)))
+    tk_canvas.create_text(100, 105, text="Time: " + str(round(sim.sim_time, 2)))
 
     if pointLabels.get():
         if pointLabelType.get() == "n":
             for p in points:
-                tk_canvas.create_text(space2canvas(p.get_pos()).x - 10, space2canvas(p.get_pos()).y - 10,
-                                      text=p.get_name())
+                view.draw_label(p.get_pos(), p.get_name(), offset=vec2(-10, -10))
         elif pointLabelType.get() == "m":
             for p in points:
-                tk_canvas.create_text(space2canvas(p.get_pos()).x - 10, space2canvas(p.get_pos()).y - 10,
-                                      text=str(p.get_mass()))
+                view.draw_label(p.get_pos(), str(p.get_mass()), offset=vec2(-10, -10))
 
     if linkLabels.get():
         if linkLabelType.get() == "n":
             for l in links:
-                tk_canvas.create_text((space2canvas(l.p1.get_pos()).x + space2canvas(l.p2.get_pos()).x) / 2,
-                                      (space2canvas(l.p1.get_pos()).y + space2canvas(l.p2.get_pos()).y) / 2,
-                                      text=l.get_name(), fill=l.get_color())
+                view.draw_label(l.get_midpoint(), l.get_name(), l.get_color())
         elif linkLabelType.get() == "k":
             for l in links:
-                tk_canvas.create_text((space2canvas(l.p1.get_pos()).x + space2canvas(l.p2.get_pos()).x) / 2,
-                                      (space2canvas(l.p1.get_pos()).y + space2canvas(l.p2.get_pos()).y) / 2,
-                                      text=str(l.get_k()), fill=l.get_color())
+                view.draw_label(l.get_midpoint(), str(l.get_k()), l.get_color())
+
+    if view.skipped:
+        tk_canvas.create_text(100, 120, text="Draw limit reached, " + str(view.skipped) + " items skipped")
 
     for c in cameras:
-        c.set_pos((f1.origin.pos + f1.p2.pos) * 0.5)
+        c.set_pos((controller.thrust.origin.pos + controller.thrust.p2.pos) * 0.5)
 
-    if cycle % 10 == 0:
-        root.update()
+    root.update()
     tk_canvas.delete("all")
 
-    for p in points:
-        p.clear_accel()
-
-    sim_time += dt
-    cycle += 1
-
 root.mainloop()
@@ -0,0 +1,291 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+
+from rocket import *
+from scenefile import *
+from abort import *
+from workers import *
+
+gain_names = ["K_gimbal", "K_angvel", "K_orient", "max_target_angvel"]
+
+########################
+#      OBJECTIVE       #
+########################
+
+class objective():
+    # scores a headless flight with the given gains: integrated flight
+    # angle error, gimbal effort and gimbal travel past max_gimbal.
+    # the run stops early once its cost passes abort_cost, the returned
+    # cost is then only a lower bound. runs tripping the abort criteria
+    # are scored as infinitely bad, which is final and not a bound.
+    # flies the default rocket unless a scene file is given
+    def __init__(self, duration=20, dt=0.001, w_angle=1, w_effort=0.01,
+                 w_saturation=10, max_gimbal=10, check_every=100, scene_path=None):
+        self.scene_path = scene_path
+        self.duration = duration
+        self.dt = dt
+        self.w_angle = w_angle
+        self.w_effort = w_effort
+        self.w_saturation = w_saturation
+        self.max_gimbal = max_gimbal
+        self.check_every = check_every
+
+    def get_settings(self):
+        return [self.scene_path, self.duration, self.dt, self.w_angle, self.w_effort,
+                self.w_saturation, self.max_gimbal]
+
+    def build(self, gains):
+        if self.scene_path is None:
+            return build_rocket(**dict(zip(gain_names, gains)))
+
+        sim = new_simulation(self.scene_path)
+        for name, value in zip(gain_names, gains):
+            setattr(sim.controller, name, value)
+
+        return sim
+
+    def __call__(self, gains, abort_cost=math.inf):
+        sim = self.build(gains)
+        sim.set_abort_monitor(default_abort_monitor(self.check_every))
+        c = sim.controller
+        dt = self.dt
+        cost = 0
+
+        while sim.sim_time < self.duration:
+            sim.step(dt)
+
+            angle_error = abs(c.desired_flight_angle - math.degrees(c.current_angle))
+            gimbal = abs(c.thrust.offset)
+            cost += (self.w_angle * angle_error + self.w_effort * gimbal +
+                     self.w_saturation * max(gimbal - self.max_gimbal, 0)) * dt
+
+            if sim.cycle % self.check_every == 0:
+                if sim.abort_reason or not math.isfinite(cost):
+                    return math.inf, False
+
+                if cost > abort_cost:
+                    return cost, True
+
+        if not math.isfinite(cost):
+            return math.inf, False
+
+        return cost, False
+
+def evaluate(job):
+    obj, gains, abort_cost = job
+    return obj(gains, abort_cost)
+
+########################
+#        CACHE         #
+########################
+
+class eval_cache():
+    # results keyed by a hash of the objective settings and the gains.
+    # an aborted run is only reused for a bound at or below the one it
+    # was aborted at
+    def __init__(self, obj):
+        self.obj = obj
+        self.results = {}
+        self.hits = 0
+
+    def get_key(self, gains):
+        text = json.dumps(self.obj.get_settings() + [round(g, 12) for g in gains])
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def get(self, gains, abort_cost):
+        result = self.results.get(self.get_key(gains))
+        if result is None:
+            return None
+
+        cost, aborted = result
+        if aborted and cost <= abort_cost:
+            return None
+
+        self.hits += 1
+        return cost
+
+    def put(self, gains, cost, aborted):
+        self.results[self.get_key(gains)] = (cost, aborted)
+
+########################
+#     NELDER-MEAD      #
+########################
+
+class nelder_mead():
+    # simplex search over the gains. with several processes, every
+    # candidate an iteration might need (reflection, expansion and both
+    # contractions) is evaluated in one parallel batch, and any run that
+    # gets worse than the worst vertex is cut short since its exact cost
+    # can't change the outcome
+    def __init__(self, obj, x0, steps=None, lower=None, upper=None,
+                 max_iter=100, ftol=1e-3, xtol=1e-4, processes=1):
+        self.obj = obj
+        self.x0 = list(x0)
+        self.steps = steps or [0.2 * x if x else 0.05 for x in x0]
+        self.lower = lower or [0] * len(x0)
+        self.upper = upper or [math.inf] * len(x0)
+        self.max_iter = max_iter
+        self.ftol = ftol
+        self.xtol = xtol
+        self.processes = processes
+
+        self.cache = eval_cache(obj)
+        self.pool = None
+        self.evaluations = 0
+        self.history = []
+
+    def in_bounds(self, x):
+        return all(lo <= v <= hi for v, lo, hi in zip(x, self.lower, self.upper))
+
+    def evaluate_batch(self, xs, abort_cost=math.inf):
+        costs = [None] * len(xs)
+        jobs = []
+
+        for i, x in enumerate(xs):
+            if not self.in_bounds(x):
+                costs[i] = math.inf
+                continue
+
+            cached = self.cache.get(x, abort_cost)
+            if cached is not None:
+                costs[i] = cached
+            else:
+                jobs.append(i)
+
+        if self.pool and len(jobs) > 1:
+            results = self.pool.map(evaluate, [(self.obj, xs[i], abort_cost) for i in jobs])
+        else:
+            results = [evaluate((self.obj, xs[i], abort_cost)) for i in jobs]
+
+        for i, (cost, aborted) in zip(jobs, results):
+            self.cache.put(xs[i], cost, aborted)
+            self.evaluations += 1
+            costs[i] = cost
+
+        return costs
+
+    def evaluate(self, x, abort_cost=math.inf):
+        return self.evaluate_batch([x], abort_cost)[0]
+
+    def run(self):
+        if self.processes > 1:
+            scenes = [self.obj.scene_path] if self.obj.scene_path else []
+            self.pool = worker_pool(self.processes, scenes)
+
+        try:
+            return self.search()
+        finally:
+            if self.pool:
+                self.pool.close()
+                self.pool = None
+
+    def search(self):
+        n = len(self.x0)
+        simplex = [self.x0]
+        for i in range(n):
+            x = list(self.x0)
+            x[i] += self.steps[i]
+            simplex.append(x)
+
+        costs = self.evaluate_batch(simplex)
+
+        for iteration in range(self.max_iter):
+            order = sorted(range(n + 1), key=lambda i: costs[i])
+            simplex = [simplex[i] for i in order]
+            costs = [costs[i] for i in order]
+
+            self.history.append((iteration, self.evaluations, costs[0], list(simplex[0])))
+
+            size = max(max(abs(a - b) / (abs(b) or 1) for a, b in zip(x, simplex[0])) for x in simplex[1:])
+            if costs[-1] - costs[0] < self.ftol and size < self.xtol:
+                break
+
+            worst = simplex[-1]
+            f_worst = costs[-1]
+            centroid = [sum(x[i] for x in simplex[:-1]) / n for i in range(n)]
+
+            def towards(scale):
+                return [c + scale * (c - w) for c, w in zip(centroid, worst)]
+
+            r = towards(1)
+            e = towards(2)
+            oc = towards(0.5)
+            ic = towards(-0.5)
+
+            if self.pool:
+                # results land in the cache, the sequential logic below
+                # then picks up whichever it actually needs
+                self.evaluate_batch([r, e, oc, ic], f_worst)
+
+            f_r = self.evaluate(r, f_worst)
+            new = None
+
+            if costs[0] <= f_r < costs[-2]:
+                new, f_new = r, f_r
+            elif f_r < costs[0]:
+                f_e = self.evaluate(e, f_r)
+                new, f_new = (e, f_e) if f_e < f_r else (r, f_r)
+            elif f_r < f_worst:
+                f_oc = self.evaluate(oc, f_r)
+                if f_oc <= f_r:
+                    new, f_new = oc, f_oc
+            else:
+                f_ic = self.evaluate(ic, f_worst)
+                if f_ic < f_worst:
+                    new, f_new = ic, f_ic
+
+            if new is not None:
+                simplex[-1] = new
+                costs[-1] = f_new
+            else:
+                # shrink towards the best vertex
+                best = simplex[0]
+                simplex = [best] + [[b + 0.5 * (v - b) for v, b in zip(x, best)] for x in simplex[1:]]
+                costs = [costs[0]] + self.evaluate_batch(simplex[1:])
+
+        best = min(range(n + 1), key=lambda i: costs[i])
+        if not self.history or costs[best] < self.history[-1][2]:
+            self.history.append((len(self.history), self.evaluations, costs[best], list(simplex[best])))
+
+        return simplex[best], costs[best]
+
+def print_history(history):
+    print("iter  evals  best cost  " + "  ".join(gain_names))
+    for iteration, evaluations, cost, gains in history:
+        print(str(iteration).rjust(4) + str(evaluations).rjust(7) + ("%.4f" % cost).rjust(11) + "  " +
+              "  ".join("%.5g" % g for g in gains))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the TVC gains of a scene.")
+    parser.add_argument("scene", nargs="?", help="scene file, the default rocket if omitted")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--max-iter", type=int, default=50)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--out", default="best_scene.json")
+    args = parser.parse_args(argv)
+
+    obj = objective(args.duration, scene_path=args.scene)
+    if args.scene:
+        # start from the gains stored in the scene
+        c = new_simulation(args.scene).controller
+        x0 = [getattr(c, name) for name in gain_names]
+    else:
+        x0 = [K_gimbal, K_angvel, K_orient, max_target_angvel]
+
+    search = nelder_mead(obj, x0, max_iter=args.max_iter, processes=args.processes)
+    best, cost = search.run()
+
+    print_history(search.history)
+    print("Best cost: " + str(round(cost, 4)) + " after " + str(search.evaluations) +
+          " runs (" + str(search.cache.hits) + " cache hits)")
+    for name, value in zip(gain_names, best):
+        print(name + " = " + str(value))
+
+    save_scene(search.obj.build(best), args.out)
+    print("Saved " + args.out)
+
+if __name__ == "__main__":
+    main()
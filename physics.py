@@ -0,0 +1,370 @@
+import math
+
+from vector2 import *
+
+drag_coeff = 1E-8
+gravity = vec2(0, -9.81)  # m/s^2
+
+########################
+#       GROUND         #
+########################
+
+class ground():
+    def __init__(self, height, color, elasticity, k):
+        self.height = height
+        self.color = color
+        self.elasticity = elasticity
+        self.k = k
+        self.contacts = []
+
+    def get_height(self):
+        return self.height
+
+    def get_color(self):
+        return self.color
+
+    def apply_force(self, points, dt):
+        # contacts of the last evaluation as (point, force applied, height
+        # the point was lifted by to put it back on the surface)
+        contacts = []
+
+        for p in points:
+            force = None
+            lift = 0
+
+            # normal force
+            if p.get_pos().y < self.height:
+                normal = vec2(0, p.mass * p.vel.y * -1 * (self.elasticity + 1) / dt)
+                p.apply_force(normal)
+                p.apply_force(gravity * p.mass)
+                force = normal + gravity * p.mass
+                lift = self.height - p.pos.y
+                p.pos.y = self.height
+
+            # friction
+            if p.get_pos().y <= self.height:
+                friction = vec2(p.vel.x, 0).normalized() * -1 * p.mass * gravity.mag() * self.k
+                p.apply_force(friction)
+                force = friction if force is None else force + friction
+
+            if force is not None:
+                contacts.append((p, force, lift))
+
+        self.contacts = contacts
+
+########################
+#       LINK           #
+########################
+
+class rigid_link():
+    def __init__(self, name, p1, p2, color, k=1000, b=0, exposed_width=0):
+        self.name = name
+        self.p1 = p1
+        self.p2 = p2
+        self.dist = get_dist_between(p1, p2)
+        # spring coefficient
+        self.k = k
+        self.b = b
+        self.color = color
+        # width of the area the link exposes to the airflow (m)
+        self.exposed_width = exposed_width
+
+        # state of the last force evaluation
+        self.length = self.dist
+        self.strain = 0
+        self.tension = 0
+
+        # unbreakable unless strength limits are set
+        self.set_strength()
+
+    def get_k(self):
+        return self.k
+
+    def get_name(self):
+        return self.name
+
+    def get_color(self):
+        return self.color
+
+    def set_strength(self, max_tension=None, max_compression=None, bending_stiffness=None):
+        # limits in N, bending stiffness (EI) in N m^2. long members give
+        # way to Euler buckling before reaching their compressive limit
+        self.max_tension = max_tension
+        self.max_compression = max_compression
+        self.bending_stiffness = bending_stiffness
+
+        self.tension_limit = max_tension if max_tension is not None else math.inf
+        self.compression_limit = max_compression if max_compression is not None else math.inf
+        self.compression_mode = "compression"
+
+        if bending_stiffness is not None and self.dist:
+            buckling_load = math.pi ** 2 * bending_stiffness / self.dist ** 2
+            if buckling_load < self.compression_limit:
+                self.compression_limit = buckling_load
+                self.compression_mode = "buckling"
+
+    def get_tension(self):
+        # axial force, positive when pulling the ends together
+        return self.tension
+
+    def get_strain(self):
+        return self.strain
+
+    def apply_force(self):
+        p1 = self.p1
+        p2 = self.p2
+
+        dx = p2.pos.x - p1.pos.x
+        dy = p2.pos.y - p1.pos.y
+        length = math.sqrt(dx * dx + dy * dy)
+
+        self.length = length
+        if self.dist:
+            self.strain = (length - self.dist) / self.dist
+
+        if not length:
+            self.tension = 0
+            return 0
+
+        ux = dx / length
+        uy = dy / length
+
+        tension = self.k * (length - self.dist)
+
+        # damping acts on the rate of change of the link length only
+        dissipated = 0
+        if self.b:
+            rate = (p2.vel.x - p1.vel.x) * ux + (p2.vel.y - p1.vel.y) * uy
+            tension += self.b * rate
+            dissipated = self.b * rate * rate
+
+        self.tension = tension
+
+        # equal and opposite, accumulated in place
+        fx = ux * tension
+        fy = uy * tension
+        a1 = p1.accel
+        a1.x += fx / p1.mass
+        a1.y += fy / p1.mass
+        a2 = p2.accel
+        a2.x -= fx / p2.mass
+        a2.y -= fy / p2.mass
+
+        # power lost to damping, for the energy budget
+        return dissipated
+
+    def get_midpoint(self):
+        return (self.p1.get_pos() + self.p2.get_pos()) / 2
+
+########################
+#     POINT MASS       #
+########################
+
+class point():
+    def __init__(self, name, pos, vel, color, mass=1, static=False):
+        self.name = name
+        self.pos = pos
+        self.vel = vel
+        self.accel = vec2()
+        self.mass = mass
+        self.static = static
+        self.color = color
+
+        self.limit_axis = None
+
+    def get_name(self):
+        return self.name
+
+    def get_pos(self):
+        return self.pos
+
+    def get_vel(self):
+        return self.vel
+
+    def get_mass(self):
+        return self.mass
+
+    def get_color(self):
+        return self.color
+
+    def get_unit_vector_towards(self, p2):
+        return (p2.pos - self.pos) / (p2.pos - self.pos).mag()
+
+    def get_vector_towards(self, p2):
+        if type(p2) is point:
+            return p2.pos - self.pos
+        else:
+            return p2 - self.pos
+
+    def clear_accel(self):
+        # call this every tick to not have residual forces from
+        # previous frame
+        self.accel = vec2(0, 0)
+
+    def apply_force(self, force):
+        self.accel += force / self.mass
+
+    def apply_gravity(self, g=None):
+        if g is None:
+            g = gravity
+
+        self.apply_force(g * self.mass)
+
+    def apply_drag(self):
+        speed = self.vel.mag()
+        self.apply_force((self.vel.normalized() * -1) * (speed ** 2) * drag_coeff)
+
+        # power lost to drag, for the energy budget
+        return speed ** 3 * drag_coeff
+
+    def update_vel(self, dt):
+        if not self.static:
+            self.vel += self.accel * dt
+
+        if self.limit_axis:
+            self.vel = self.limit_axis * self.vel.dot(self.limit_axis)
+
+    def update_pos(self, dt):
+        if not self.static:
+            self.pos += self.vel * dt
+
+    def set_limit_axis(self, vec):
+        if vec == "x":
+            self.limit_axis = vec2(1, 0)
+        elif vec == "y":
+            self.limit_axis = vec2(0, 1)
+        else:
+            self.limit_axis = vec.normalized()
+
+########################
+#    CONSTANT FORCE    #
+########################
+
+class const_force():
+    def __init__(self, name, point, force):
+        self.name = name
+        self.point = point
+        self.force = force
+
+    def apply(self):
+        self.point.apply_force(self.force)
+
+def get_dist_between(p1, p2):
+    if (type(p1) is point) and (type(p2) is point):
+        return (p1.pos - p2.pos).mag()
+    elif (type(p1) is point) and not (type(p2) is point):
+        return (p1.pos - p2).mag()
+    elif not (type(p1) is point) and (type(p2) is point):
+        return (p1 - p2.pos).mag()
+    else:
+        return (p1 - p2).mag()
+
+class propellant:
+    def __init__(self, name, pos, vel, color, mass=1):
+        self.name = name
+        self.pos = pos
+        self.vel = vel
+        self.accel = vec2()
+        self.mass = mass
+        self.color = color
+
+        self.limit_axis = None
+
+    def get_name(self):
+        return self.name
+
+    def get_pos(self):
+        return self.pos
+
+    def get_vel(self):
+        return self.vel
+
+    def get_mass(self):
+        return self.mass
+
+    def get_color(self):
+        return self.color
+
+    def get_unit_vector_towards(self, p2):
+        return (p2.pos - self.pos) / (p2.pos - self.pos).mag()
+
+    def get_vector_towards(self, p2):
+        if type(p2) is point:
+            return p2.pos - self.pos
+        else:
+            return p2 - self.pos
+
+    def clear_accel(self):
+        # call this every tick to not have residual forces from
+        # previous frame
+        self.accel = vec2(0, 0)
+
+    def apply_force(self, force):
+        self.accel += force / self.mass
+
+    def apply_gravity(self, g=None):
+        if g is None:
+            g = gravity
+
+        self.apply_force(g * self.mass)
+
+    def apply_drag(self):
+        speed = self.vel.mag()
+        self.apply_force((self.vel.normalized() * -1) * (speed ** 2) * drag_coeff)
+
+        # power lost to drag, for the energy budget
+        return speed ** 3 * drag_coeff
+
+    def update_vel(self, dt):
+        self.vel += self.accel * dt
+
+        if self.limit_axis:
+            self.vel = self.limit_axis * self.vel.dot(self.limit_axis)
+
+    def update_pos(self, dt):
+        self.pos += self.vel * dt
+
+    def set_limit_axis(self, vec):
+        if vec == "x":
+            self.limit_axis = vec2(1, 0)
+        elif vec == "y":
+            self.limit_axis = vec2(0, 1)
+        else:
+            self.limit_axis = vec.normalized()
+
+########################
+#        THRUST        #
+########################
+
+class thrust:
+    def __init__(self, magnitude, origin, p2, offset, offset_rate):
+        self.magnitude = magnitude
+        self.origin = origin
+        self.p2 = p2
+        self.offset = offset
+        self.direction = self.origin.get_unit_vector_towards(self.p2)
+        self.offset_rate = offset_rate
+
+        self.active = True
+        # seconds spent firing
+        self.burn_time = 0
+
+    def set_active(self, active):
+        self.active = active
+
+    def move_towards_offset(self, target, dt):
+        if target > self.offset and target > self.offset + self.offset_rate * dt:
+            self.offset += self.offset_rate * dt
+        elif target < self.offset and target < self.offset - self.offset_rate * dt:
+            self.offset -= self.offset_rate * dt
+        elif (target > self.offset and target < self.offset + self.offset_rate * dt) or (target < self.offset and target > self.offset - self.offset_rate * dt):
+            self.offset = target
+
+    def apply_force(self, dt):
+        self.direction = self.origin.get_unit_vector_towards(self.p2)
+        self.direction = self.direction.rotated(math.radians(self.offset))
+
+        if self.active:
+            force = self.direction * self.magnitude
+            self.origin.apply_force(force)
+            self.burn_time += dt
@@ -0,0 +1,197 @@
+import json
+import struct
+
+from scenefile import *
+
+########################
+#      RECORDING       #
+########################
+
+# file layout: magic, header length (uint32), JSON header, then fixed size
+# frames of little endian doubles:
+#   sim time, target gimbal, current angle (rad), desired angle (deg),
+#   gimbal offset of each thrust, x and y of each point
+# every frame has the same size, so frame i starts at
+# data_offset + i * frame_size and can be read without touching the rest.
+# closing the file appends a trailer: a JSON list of [frame, link index]
+# for the header links that were removed during the run, its length
+# (uint32) and the trailer magic. a recording cut short has no trailer
+
+record_magic = b"SLOSHREC2\n"
+old_record_magic = b"SLOSHREC1\n"
+trailer_magic = b"SLOSHEND\n"
+frame_head = 4
+
+class recorder():
+    def __init__(self, path, sim, every=10):
+        self.every = every
+        self.points = list(sim.scene.points)
+        self.thrusts = list(sim.thrusts)
+        self.frames = 0
+
+        # links of the header scene, and which of them have gone
+        self.links = list(sim.scene.links)
+        self.link_count = len(self.links)
+        self.removed = set()
+        self.removed_log = []
+
+        header = {"every": every,
+                  "points": [p.get_name() for p in self.points],
+                  "thrusts": len(self.thrusts),
+                  "scene": simulation_to_dict(sim)}
+
+        self.fmt = struct.Struct("<" + str(frame_head + len(self.thrusts) + 2 * len(self.points)) + "d")
+
+        self.file = open(path, "wb")
+        header_bytes = json.dumps(header).encode()
+        self.file.write(record_magic)
+        self.file.write(struct.pack("<I", len(header_bytes)))
+        self.file.write(header_bytes)
+
+        # the state the run starts from is the first frame
+        self.write_frame(sim)
+
+    def record(self, sim):
+        if sim.cycle % self.every:
+            return
+
+        self.write_frame(sim)
+
+    def write_frame(self, sim):
+        # links only ever need looking at when some have been removed
+        links = sim.scene.links
+        if len(links) != self.link_count - len(self.removed):
+            for i, l in enumerate(self.links):
+                if not i in self.removed and not l in links:
+                    self.removed.add(i)
+                    self.removed_log.append([self.frames, i])
+
+        c = sim.controller
+        values = [sim.sim_time, c.target_offset, c.current_angle, c.desired_flight_angle]
+        for t in self.thrusts:
+            values.append(t.offset)
+        for p in self.points:
+            values.append(p.pos.x)
+            values.append(p.pos.y)
+
+        self.file.write(self.fmt.pack(*values))
+        self.frames += 1
+
+    def close(self):
+        trailer = json.dumps(self.removed_log).encode()
+        self.file.write(trailer)
+        self.file.write(struct.pack("<I", len(trailer)))
+        self.file.write(trailer_magic)
+        self.file.close()
+
+class recording():
+    # reads frames lazily, only the header is parsed on open
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+
+        magic = self.file.read(len(record_magic))
+        if magic != record_magic and magic != old_record_magic:
+            raise ValueError(path + " is not a SloshTVC recording")
+
+        header_len = struct.unpack("<I", self.file.read(4))[0]
+        self.header = json.loads(self.file.read(header_len).decode())
+        self.data_offset = len(record_magic) + 4 + header_len
+
+        self.point_names = self.header["points"]
+        self.point_index = {name: i for i, name in enumerate(self.point_names)}
+        self.thrust_count = self.header["thrusts"]
+
+        self.fmt = struct.Struct("<" + str(frame_head + self.thrust_count + 2 * len(self.point_names)) + "d")
+        self.frame_size = self.fmt.size
+
+        self.file.seek(0, 2)
+        data_end = self.file.tell()
+
+        # [frame, link index] of the header links removed during the run
+        self.removed_links = []
+        tail = len(trailer_magic) + 4
+        if magic == record_magic and data_end - self.data_offset >= tail:
+            self.file.seek(data_end - tail)
+            trailer_len = struct.unpack("<I", self.file.read(4))[0]
+            if self.file.read(len(trailer_magic)) == trailer_magic:
+                data_end -= tail + trailer_len
+                self.file.seek(data_end)
+                self.removed_links = json.loads(self.file.read(trailer_len).decode())
+
+        self.frame_count = (data_end - self.data_offset) // self.frame_size
+
+        self.time_struct = struct.Struct("<d")
+
+    def get_frame_offset(self, i):
+        return self.data_offset + i * self.frame_size
+
+    def get_frame_time(self, i):
+        self.file.seek(self.get_frame_offset(i))
+        return self.time_struct.unpack(self.file.read(8))[0]
+
+    def find_frame(self, t, hint=None):
+        # last frame at or before t. frame times are read from disk as
+        # the binary search needs them, a hint (the frame shown last)
+        # makes stepping through in order a single read
+        last = self.frame_count - 1
+        if last < 0:
+            return None
+
+        if hint is not None and 0 <= hint < last:
+            if self.get_frame_time(hint) <= t < self.get_frame_time(hint + 1):
+                return hint
+
+        lo = 0
+        hi = last
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.get_frame_time(mid) <= t:
+                lo = mid
+            else:
+                hi = mid - 1
+
+        return lo
+
+    def read_frame(self, i):
+        self.file.seek(self.get_frame_offset(i))
+        return self.fmt.unpack(self.file.read(self.frame_size))
+
+    def iter_chunks(self, chunk_frames=4096):
+        # frames in chunks, memory use stays bounded by the chunk size
+        i = 0
+        while i < self.frame_count:
+            n = min(chunk_frames, self.frame_count - i)
+            self.file.seek(self.get_frame_offset(i))
+            data = self.file.read(n * self.frame_size)
+            yield [self.fmt.unpack_from(data, k * self.frame_size) for k in range(n)]
+            i += n
+
+    def get_removed_links(self, i):
+        # indices of the header links already gone by frame i
+        return set(link for frame, link in self.removed_links if frame <= i)
+
+    def get_point_slot(self, name):
+        # index of the point's x value within a frame
+        return frame_head + self.thrust_count + 2 * self.point_index[name]
+
+    def get_sample_period(self):
+        if self.frame_count < 2:
+            return 0
+
+        return self.read_frame(1)[0] - self.read_frame(0)[0]
+
+    def close(self):
+        self.file.close()
+
+def record_run(sim, path, until, dt=0.001, every=10):
+    rec = recorder(path, sim, every)
+    sim.set_recorder(rec)
+
+    try:
+        completed = sim.run(until, dt)
+    finally:
+        sim.set_recorder(None)
+        rec.close()
+
+    return completed
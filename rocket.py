@@ -0,0 +1,152 @@
+from physics import *
+from scene import *
+from sim import *
+from cluster import *
+
+# default rocket with a four-mass propellant tank model
+K_gimbal = 35
+K_angvel = 1e-2
+max_target_angvel = 0.5
+K_orient = 1
+
+rocket_mass = 500
+payload_mass = 20
+rocket_length = 70
+rocket_diameter = 4
+rocket_rigidity = 15e6
+rocket_damping = 1e-4
+pt_mass = rocket_mass / 14
+propellant_mass = 5000
+propellant_bumparoundability = 15e4
+propellant_sloshcosity = 50
+
+def build_rocket(K_gimbal=K_gimbal, K_angvel=K_angvel, K_orient=K_orient,
+                 max_target_angvel=max_target_angvel):
+    p00 = point("p00", vec2(-2, 0), vec2(), "seagreen", pt_mass)
+    p01 = point("p01", vec2(-2, 15), vec2(), "seagreen", pt_mass)
+    p02 = point("p02", vec2(-2, 40), vec2(), "seagreen", pt_mass)
+    p03 = point("p03", vec2(-2, 50), vec2(), "seagreen", pt_mass)
+    p04 = point("p04", vec2(-2, 60), vec2(), "seagreen", pt_mass)
+    p05 = point("p05", vec2(-2, 65), vec2(), "seagreen", pt_mass)
+
+    p20 = point("p20", vec2(2, 0), vec2(), "seagreen", pt_mass)
+    p21 = point("p21", vec2(2, 15), vec2(), "seagreen", pt_mass)
+    p22 = point("p22", vec2(2, 40), vec2(), "seagreen", pt_mass)
+    p23 = point("p23", vec2(2, 50), vec2(), "seagreen", pt_mass)
+    p24 = point("p24", vec2(2, 60), vec2(), "seagreen", pt_mass)
+    p25 = point("p25", vec2(2, 65), vec2(), "seagreen", pt_mass)
+
+    p10 = point("p10", vec2(0, 7), vec2(), "seagreen", propellant_mass * 0.3)
+    p11 = point("p11", vec2(0, 40-13), vec2(), "seagreen", propellant_mass * 0.4)
+    p12 = point("p12", vec2(0, 45), vec2(), "seagreen", propellant_mass * 0.1)
+    p13 = point("p13", vec2(0, 55), vec2(), "seagreen", propellant_mass * 0.2)
+    p14 = point("p14", vec2(0, 65), vec2(), "seagreen", payload_mass)
+    p15 = point("p15", vec2(0, 70), vec2(), "seagreen", pt_mass)
+
+    pt = point("pt", vec2(0,0), vec2(), "seagreen", pt_mass)
+
+    s01 = rigid_link("s0", p00, pt, "skyblue", rocket_rigidity, rocket_damping)
+    s02 = rigid_link("s0", p20, pt, "skyblue", rocket_rigidity, rocket_damping)
+    s03 = rigid_link("s0", p01, pt, "skyblue", rocket_rigidity, rocket_damping)
+    s04 = rigid_link("s0", p21, pt, "skyblue", rocket_rigidity, rocket_damping)
+    s1 = rigid_link("s1", p01, p21, "skyblue", rocket_rigidity, rocket_damping)
+    s2 = rigid_link("s2", p02, p22, "skyblue", rocket_rigidity, rocket_damping)
+    s3 = rigid_link("s3", p03, p23, "skyblue", rocket_rigidity, rocket_damping)
+    s4 = rigid_link("s4", p04, p24, "skyblue", rocket_rigidity, rocket_damping)
+
+    v1 = rigid_link("v1", p00, p01, "skyblue", rocket_rigidity, rocket_damping)
+    v2 = rigid_link("v2", p01, p02, "skyblue", rocket_rigidity, rocket_damping)
+    v3 = rigid_link("v3", p02, p03, "skyblue", rocket_rigidity, rocket_damping)
+    v4 = rigid_link("v4", p03, p04, "skyblue", rocket_rigidity, rocket_damping)
+    v5 = rigid_link("v5", p04, p05, "skyblue", rocket_rigidity, rocket_damping)
+    v6 = rigid_link("v6", p20, p21, "skyblue", rocket_rigidity, rocket_damping)
+    v7 = rigid_link("v7", p21, p22, "skyblue", rocket_rigidity, rocket_damping)
+    v8 = rigid_link("v8", p22, p23, "skyblue", rocket_rigidity, rocket_damping)
+    v9 = rigid_link("v9", p23, p24, "skyblue", rocket_rigidity, rocket_damping)
+    v10 = rigid_link("v10", p24, p25, "skyblue", rocket_rigidity, rocket_damping)
+
+    tip1 = rigid_link("tip1", p05, p15, "skyblue", rocket_rigidity, rocket_damping)
+    tip2 = rigid_link("tip2", p15, p25, "skyblue", rocket_rigidity, rocket_damping)
+    tip3 = rigid_link("tip3", p05, p25, "skyblue", rocket_rigidity, rocket_damping)
+
+    adapter1 = rigid_link("adapter1", p04, p14, "skyblue", rocket_rigidity, rocket_damping)
+    adapter2 = rigid_link("adapter1", p24, p14, "skyblue", rocket_rigidity, rocket_damping)
+
+    c1 = rigid_link("c1", p00, p21, "skyblue", rocket_rigidity, rocket_damping)
+    c2 = rigid_link("c2", p01, p22, "skyblue", rocket_rigidity, rocket_damping)
+    c3 = rigid_link("c3", p02, p23, "skyblue", rocket_rigidity, rocket_damping)
+    c4 = rigid_link("c4", p03, p24, "skyblue", rocket_rigidity, rocket_damping)
+    c5 = rigid_link("c1", p04, p25, "skyblue", rocket_rigidity, rocket_damping)
+
+    c6 = rigid_link("c6", p01, p20, "skyblue", rocket_rigidity, rocket_damping)
+    c7 = rigid_link("c7", p02, p21, "skyblue", rocket_rigidity, rocket_damping)
+    c8 = rigid_link("c8", p03, p22, "skyblue", rocket_rigidity, rocket_damping)
+    c9 = rigid_link("c9", p04, p23, "skyblue", rocket_rigidity, rocket_damping)
+    c10 = rigid_link("c10", p05, p24, "skyblue", rocket_rigidity, rocket_damping)
+
+    pl01 = rigid_link("pl01", p00, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl02 = rigid_link("pl02", p20, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl03 = rigid_link("pl03", p21, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl04 = rigid_link("pl04", p01, p10, "orange", propellant_bumparoundability, propellant_sloshcosity)
+
+    pl11 = rigid_link("pl11", p01, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl12 = rigid_link("pl12", p21, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl13 = rigid_link("pl13", p22, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl14 = rigid_link("pl14", p02, p11, "orange", propellant_bumparoundability, propellant_sloshcosity)
+
+    pl21 = rigid_link("pl21", p02, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl22 = rigid_link("pl22", p22, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl23 = rigid_link("pl23", p23, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl24 = rigid_link("pl24", p03, p12, "orange", propellant_bumparoundability, propellant_sloshcosity)
+
+    pl31 = rigid_link("pl31", p03, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl32 = rigid_link("pl32", p23, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl33 = rigid_link("pl33", p24, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
+    pl34 = rigid_link("pl34", p04, p13, "orange", propellant_bumparoundability, propellant_sloshcosity)
+
+    # outer skin, each side exposes half of the body width to the airflow
+    for l in [v1, v2, v3, v4, v5, v6, v7, v8, v9, v10, tip1, tip2]:
+        l.exposed_width = rocket_diameter / 2
+
+    f1 = thrust((rocket_mass + propellant_mass) * 30, pt, p15, 0, 25)
+
+    floor = ground(-100, "green", 0.5, 0.8)
+
+    rocket_scene = scene()
+    for p in [p00, p01, p02, p03, p04, p05,
+              p10, p11, p12, p13, p14, p15,
+              p20, p21, p22, p23, p24, p25,
+              pt]:
+        rocket_scene.add_point(p)
+
+    for l in [s01, s02, s03, s04,
+              s1, s2, s3, s4,
+              v1, v2, v3, v4, v5, v6, v7, v8, v9, v10,
+              tip1, tip2, tip3,
+              adapter1, adapter2,
+              c1, c2, c3, c4, c5, c6, c7, c8, c9, c10,
+              pl01, pl02, pl03, pl04,
+              pl11, pl12, pl13, pl14,
+              pl21, pl22, pl23, pl24,
+              pl31, pl32, pl33, pl34]:
+        rocket_scene.add_link(l)
+
+    controller = tvc(f1, rocket_length, K_gimbal, K_angvel, K_orient, max_target_angvel)
+    return simulation(rocket_scene, floor, [f1], controller)
+
+def build_cluster_rocket(K_gimbal=K_gimbal, K_angvel=K_angvel, K_orient=K_orient,
+                         max_target_angvel=max_target_angvel, **actuator):
+    # the default rocket with its single engine split into three along
+    # the base, each gimballed by its own actuator
+    sim = build_rocket(K_gimbal, K_angvel, K_orient, max_target_angvel)
+    points = {p.get_name(): p for p in sim.scene.points}
+    single = sim.thrusts[0]
+
+    cluster = engine_cluster()
+    for origin, p2 in [("p00", "p05"), ("pt", "p15"), ("p20", "p25")]:
+        engine = thrust(single.magnitude / 3, points[origin], points[p2], 0, single.offset_rate)
+        cluster.add_engine(engine, **actuator)
+
+    sim.controller.set_thrust(cluster.thrusts[1])
+    sim.set_cluster(cluster)
+    return sim
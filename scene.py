@@ -0,0 +1,131 @@
+########################
+#      REGISTRY        #
+########################
+
+class registry():
+    # holds entities under stable integer ids. removing an entity only
+    # clears its slot in the dense list, the list itself is compacted
+    # lazily once enough holes pile up, so both add and remove are O(1)
+    def __init__(self, max_hole_ratio=0.25):
+        self.next_id = 0
+        self.entities = {}
+        self.slots = {}
+        self.dense = []
+        self.holes = 0
+        self.max_hole_ratio = max_hole_ratio
+
+    def add(self, entity):
+        entity.id = self.next_id
+        self.next_id += 1
+
+        self.entities[entity.id] = entity
+        self.slots[entity.id] = len(self.dense)
+        self.dense.append(entity)
+        return entity.id
+
+    def remove(self, entity):
+        if not entity in self:
+            return False
+
+        del self.entities[entity.id]
+        self.dense[self.slots.pop(entity.id)] = None
+        self.holes += 1
+        return True
+
+    def get(self, entity_id):
+        return self.entities.get(entity_id)
+
+    def get_ids(self):
+        return list(self.entities.keys())
+
+    def compact(self):
+        if not self.holes:
+            return
+
+        self.dense = [e for e in self.dense if e is not None]
+        self.slots = {e.id: i for i, e in enumerate(self.dense)}
+        self.holes = 0
+
+    def __contains__(self, entity):
+        return self.entities.get(getattr(entity, "id", None)) is entity
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        if self.holes > len(self.dense) * self.max_hole_ratio:
+            self.compact()
+
+        # slots removed while iterating are skipped
+        dense = self.dense
+        for i in range(len(dense)):
+            if dense[i] is not None:
+                yield dense[i]
+
+########################
+#        SCENE         #
+########################
+
+class scene():
+    # points, links and forces of a simulation along with the
+    # point -> links/forces adjacency, so that removing a point never
+    # leaves anything dangling and never needs a full scan
+    def __init__(self):
+        self.points = registry()
+        self.links = registry()
+        self.forces = registry()
+
+        self.point_links = {}
+        self.point_forces = {}
+
+    def add_point(self, p):
+        self.points.add(p)
+        self.point_links[p.id] = {}
+        self.point_forces[p.id] = {}
+        return p
+
+    def add_link(self, l):
+        self.links.add(l)
+        self.point_links.setdefault(l.p1.id, {})[l.id] = l
+        self.point_links.setdefault(l.p2.id, {})[l.id] = l
+        return l
+
+    def add_force(self, f):
+        self.forces.add(f)
+        self.point_forces.setdefault(f.point.id, {})[f.id] = f
+        return f
+
+    def remove_link(self, l):
+        if not self.links.remove(l):
+            return False
+
+        self.point_links.get(l.p1.id, {}).pop(l.id, None)
+        self.point_links.get(l.p2.id, {}).pop(l.id, None)
+        return True
+
+    def remove_force(self, f):
+        if not self.forces.remove(f):
+            return False
+
+        self.point_forces.get(f.point.id, {}).pop(f.id, None)
+        return True
+
+    def remove_point(self, p):
+        if not p in self.points:
+            return False
+
+        for l in list(self.point_links.pop(p.id).values()):
+            self.remove_link(l)
+
+        for f in list(self.point_forces.pop(p.id).values()):
+            self.remove_force(f)
+
+        self.points.remove(p)
+        return True
+
+    def get_links_of(self, p):
+        return list(self.point_links.get(p.id, {}).values())
+
+    def get_forces_of(self, p):
+        return list(self.point_forces.get(p.id, {}).values())
+
@@ -0,0 +1,147 @@
+import json
+
+from vector2 import *
+from physics import *
+from scene import *
+from sim import *
+from guidance import *
+from cluster import *
+from atmosphere import *
+from loads import *
+
+########################
+#     SCENE FILES      #
+########################
+
+# points are referred to by their index in the file, link and entity
+# names are not unique so they can't be used as references
+
+def simulation_to_dict(sim):
+    points = list(sim.scene.points)
+    index = {p.id: i for i, p in enumerate(points)}
+
+    data = {
+        "points": [{"name": p.name, "pos": [p.pos.x, p.pos.y], "vel": [p.vel.x, p.vel.y],
+                    "color": p.color, "mass": p.mass, "static": bool(p.static)} for p in points],
+        "links": [{"name": l.name, "p1": index[l.p1.id], "p2": index[l.p2.id], "color": l.color,
+                   "k": l.k, "b": l.b, "dist": l.dist, "exposed_width": l.exposed_width,
+                   "max_tension": l.max_tension, "max_compression": l.max_compression,
+                   "bending_stiffness": l.bending_stiffness}
+                  for l in sim.scene.links],
+        "forces": [{"name": f.name, "point": index[f.point.id], "force": [f.force.x, f.force.y]}
+                   for f in sim.scene.forces],
+        "thrusts": [{"magnitude": t.magnitude, "origin": index[t.origin.id], "p2": index[t.p2.id],
+                     "offset": t.offset, "offset_rate": t.offset_rate, "active": t.active}
+                    for t in sim.thrusts],
+        "floor": {"height": sim.floor.height, "color": sim.floor.color,
+                  "elasticity": sim.floor.elasticity, "k": sim.floor.k},
+    }
+
+    c = sim.controller
+    data["tvc"] = {"thrust": sim.thrusts.index(c.thrust), "rocket_length": c.rocket_length,
+                   "K_gimbal": c.K_gimbal, "K_angvel": c.K_angvel, "K_orient": c.K_orient,
+                   "max_target_angvel": c.max_target_angvel}
+
+    if c.guidance:
+        data["tvc"]["guidance"] = {"key": c.guidance.key,
+                                   "table": [[x, a] for x, a in zip(c.guidance.xs, c.guidance.angles)]}
+
+    if sim.gravity_model:
+        g = sim.gravity_model
+        data["gravity"] = {"g0": g.g0, "radius": g.radius, "max_alt": g.max_alt, "alt_step": g.alt_step}
+
+    if sim.atmosphere:
+        atm = sim.atmosphere
+        data["atmosphere"] = {"wind_speed": atm.wind_speed, "wind_ref_alt": atm.wind_ref_alt,
+                              "wind_exponent": atm.wind_exponent, "gust_intensity": atm.gust_intensity,
+                              "gust_length": atm.gust_length, "gust_airspeed": atm.gust_airspeed,
+                              "duration": atm.duration, "seed": atm.seed, "drag_coeff": atm.drag_coeff,
+                              "max_alt": atm.max_alt, "alt_step": atm.alt_step, "gust_step": atm.gust_step}
+
+    # the seed the stochastic inputs are derived from, if one was set
+    data["seed"] = sim.seed
+
+    if sim.cluster:
+        # engines in the order of the thrusts, which the cluster owns
+        cl = sim.cluster
+        data["cluster"] = [{"arm": cl.arms[i], "max_rate": cl.max_rates[i],
+                            "max_angle": cl.max_angles[i] if math.isfinite(cl.max_angles[i]) else None,
+                            "natural_freq": cl.natural_freqs[i], "damping_ratio": cl.damping_ratios[i],
+                            "backlash": cl.backlashes[i], "command": cl.commands[i],
+                            "angle": cl.angles[i], "rate": cl.rates[i], "nozzle": cl.nozzles[i]}
+                           for i in range(len(cl.thrusts))]
+
+    return data
+
+def simulation_from_dict(data):
+    new_scene = scene()
+
+    points = []
+    for d in data["points"]:
+        p = point(d["name"], vec2(*d["pos"]), vec2(*d["vel"]), d["color"], d["mass"], d["static"])
+        points.append(new_scene.add_point(p))
+
+    for d in data["links"]:
+        l = rigid_link(d["name"], points[d["p1"]], points[d["p2"]], d["color"], d["k"], d["b"],
+                       d.get("exposed_width", 0))
+        l.dist = d.get("dist", l.dist)
+        l.set_strength(d.get("max_tension"), d.get("max_compression"), d.get("bending_stiffness"))
+        new_scene.add_link(l)
+
+    for d in data.get("forces", []):
+        new_scene.add_force(const_force(d["name"], points[d["point"]], vec2(*d["force"])))
+
+    thrusts = []
+    for d in data["thrusts"]:
+        t = thrust(d["magnitude"], points[d["origin"]], points[d["p2"]], d["offset"], d["offset_rate"])
+        t.set_active(d.get("active", True))
+        thrusts.append(t)
+
+    f = data["floor"]
+    floor = ground(f["height"], f["color"], f["elasticity"], f["k"])
+
+    c = data["tvc"]
+    controller = tvc(thrusts[c["thrust"]], c["rocket_length"], c["K_gimbal"], c["K_angvel"],
+                     c["K_orient"], c["max_target_angvel"])
+
+    if "guidance" in c:
+        controller.set_guidance(pitch_program(c["guidance"]["table"], c["guidance"]["key"]))
+
+    sim = simulation(new_scene, floor, thrusts, controller)
+
+    # strength limits only mean something with a monitor to enforce them
+    for l in new_scene.links:
+        if l.max_tension is not None or l.max_compression is not None or l.bending_stiffness is not None:
+            sim.set_load_monitor(load_monitor())
+            break
+
+    if "gravity" in data:
+        sim.set_gravity_model(inverse_square_gravity(**data["gravity"]))
+
+    if "atmosphere" in data:
+        sim.set_atmosphere(atmosphere(**data["atmosphere"]))
+    if data.get("seed") is not None:
+        sim.set_seed(data["seed"])
+
+    if "cluster" in data:
+        cl = engine_cluster()
+        for t, d in zip(thrusts, data["cluster"]):
+            max_angle = d["max_angle"] if d["max_angle"] is not None else math.inf
+            cl.add_engine(t, d["arm"], d["max_rate"], max_angle, d["natural_freq"],
+                          d["damping_ratio"], d["backlash"])
+            i = len(cl.thrusts) - 1
+            cl.commands[i] = d["command"]
+            cl.angles[i] = d["angle"]
+            cl.rates[i] = d["rate"]
+            cl.nozzles[i] = d["nozzle"]
+        sim.set_cluster(cl)
+
+    return sim
+
+def save_scene(sim, path):
+    with open(path, "w") as f:
+        json.dump(simulation_to_dict(sim), f, indent=1)
+
+def load_scene(path):
+    with open(path) as f:
+        return simulation_from_dict(json.load(f))
@@ -0,0 +1,274 @@
+import math
+
+from vector2 import *
+from physics import *
+from scene import *
+from events import *
+from determinism import *
+
+########################
+#         TVC          #
+########################
+
+class tvc():
+    def __init__(self, thrust, rocket_length, K_gimbal, K_angvel, K_orient, max_target_angvel):
+        self.thrust = thrust
+        self.rocket_length = rocket_length
+        self.K_gimbal = K_gimbal
+        self.K_angvel = K_angvel
+        self.K_orient = K_orient
+        self.max_target_angvel = max_target_angvel
+
+        # pitch program, the built-in altitude steps are used without one
+        self.guidance = None
+        # spreads the gimbal command over several engines when set,
+        # otherwise the controller slews its own thrust
+        self.mixer = None
+
+        # last control tick, kept for display and recording
+        self.desired_flight_angle = 0
+        self.current_angle = 0
+        self.angvels = 0
+        self.target_angvel = 0
+        self.target_offset = 0
+
+    def set_thrust(self, thrust):
+        self.thrust = thrust
+
+    def set_mixer(self, mixer):
+        self.mixer = mixer
+
+    def set_guidance(self, program):
+        self.guidance = program
+
+    def get_desired_flight_angle(self, sim_time=0):
+        t = self.thrust
+
+        if self.guidance:
+            return self.guidance.get_target_angle(t.origin.pos.y, sim_time)
+
+        if t.origin.pos.y < 500:
+            return 10
+        elif t.origin.pos.y < 1500:
+            return 25
+        elif t.origin.pos.y < 5000:
+            return 45
+        else:
+            return 60
+
+    def update(self, dt, sim_time=0):
+        t = self.thrust
+        desired_flight_angle = self.get_desired_flight_angle(sim_time)
+
+        tip_rvel = t.p2.vel - t.origin.vel
+        tip_rpos = t.p2.pos - t.origin.pos
+        ang_vel = tip_rvel - tip_rpos.normalized() * tip_rvel.dot(tip_rpos.normalized())
+        if ang_vel.x > 0:
+            if ang_vel.y < 0:
+                angvels = ang_vel.mag() / self.rocket_length
+            else:
+                angvels = -ang_vel.mag() / self.rocket_length
+        else:
+            if ang_vel.y < 0:
+                angvels = ang_vel.mag() / self.rocket_length
+            else:
+                angvels = -ang_vel.mag() / self.rocket_length
+
+        desired_dir = vec2(0, 1).rotated(math.radians(desired_flight_angle)).normalized()
+        current_dir = (t.p2.pos - t.origin.pos).normalized()
+        current_angle = -math.atan2((t.p2.pos - t.origin.pos).x, (t.p2.pos - t.origin.pos).y)
+        correction = (desired_dir - current_dir).normalized()
+
+        correction_mag = desired_flight_angle - math.degrees(current_angle)
+
+        if correction.x > 0:
+            if correction.y > 0:
+                target_angvel = -self.K_angvel * correction_mag
+            else:
+                target_angvel = self.K_angvel * correction_mag
+        else:
+            if correction.y > 0:
+                target_angvel = -self.K_angvel * correction_mag
+            else:
+                target_angvel = self.K_angvel * correction_mag
+
+        if target_angvel < -self.max_target_angvel:
+            target_angvel = -self.max_target_angvel
+        elif target_angvel > self.max_target_angvel:
+            target_angvel = self.max_target_angvel
+
+        angvel_error = (angvels - target_angvel) * self.K_orient
+        target_offset = angvel_error * self.K_gimbal
+
+        if self.mixer:
+            self.mixer.command(target_offset)
+        else:
+            t.move_towards_offset(target_offset, dt)
+
+        self.desired_flight_angle = desired_flight_angle
+        self.current_angle = current_angle
+        self.angvels = angvels
+        self.target_angvel = target_angvel
+        self.target_offset = target_offset
+
+########################
+#      SIMULATION      #
+########################
+
+class simulation():
+    # steps a scene without any GUI attached, the viewer only draws
+    # whatever state this leaves behind. a step always runs in the same
+    # order: floor, constant forces, TVC, thrust (or the cluster), links,
+    # load monitoring (which may remove links), atmosphere drag, then each
+    # point in turn gets gravity, drag when there is no atmosphere, and
+    # moves. the energy budget then reads what the step left behind.
+    # entities are visited in the order they were added, so the same
+    # scene and seed give the same trajectory bit for bit wherever it runs
+    def __init__(self, scene, floor, thrusts, controller):
+        self.scene = scene
+        self.floor = floor
+        self.thrusts = thrusts
+        self.controller = controller
+
+        self.sim_time = 0
+        self.cycle = 0
+
+        # per-link aerodynamic drag replaces the per-point drag when set
+        self.atmosphere = None
+        # altitude dependent gravity replaces the constant one when set
+        self.gravity_model = None
+
+        # run-abort checks, the reason and time are kept once one trips
+        self.abort_monitor = None
+        self.abort_reason = None
+        self.abort_time = None
+
+        # writes frames to disk as the run goes
+        self.recorder = None
+        # tracks peak link loads and breaks overloaded links
+        self.load_monitor = None
+        # power lost to link damping and to per-point drag over the last step
+        self.damping_power = 0
+        self.drag_power = 0
+        # energy and momentum budget, accumulated step by step
+        self.energy_monitor = None
+        # engines with their own actuators, stepped as one batch
+        self.cluster = None
+
+        # stochastic inputs are reseeded from this when it is set
+        self.seed = None
+        # running state hash, for comparing runs step by step
+        self.hasher = None
+
+        self.events = timeline()
+        self.events.add_channel("time", lambda sim: sim.sim_time)
+        self.events.add_channel("altitude", lambda sim: sim.controller.thrust.origin.pos.y)
+
+    def set_seed(self, seed):
+        self.seed = seed
+        if self.atmosphere:
+            self.atmosphere.reseed(derive_seed(seed, "atmosphere"))
+
+    def set_hasher(self, hasher):
+        self.hasher = hasher
+
+    def set_atmosphere(self, atm):
+        self.atmosphere = atm
+        if atm and self.seed is not None:
+            atm.reseed(derive_seed(self.seed, "atmosphere"))
+
+    def set_gravity_model(self, model):
+        self.gravity_model = model
+
+    def set_abort_monitor(self, monitor):
+        self.abort_monitor = monitor
+
+    def set_cluster(self, cluster):
+        # the cluster's engines become the simulation's thrusts and the
+        # controller commands them through the cluster
+        self.cluster = cluster
+        self.thrusts = cluster.thrusts
+        self.controller.set_mixer(cluster)
+
+    def set_load_monitor(self, monitor):
+        self.load_monitor = monitor
+
+    def set_energy_monitor(self, monitor):
+        self.energy_monitor = monitor
+        if monitor:
+            monitor.start(self)
+
+    def set_recorder(self, rec):
+        self.recorder = rec
+
+    def step(self, dt):
+        points = self.scene.points
+
+        self.floor.apply_force(points, dt)
+
+        for f in self.scene.forces:
+            f.apply()
+
+        self.controller.update(dt, self.sim_time)
+
+        if self.cluster:
+            self.cluster.update(dt)
+        else:
+            for t in self.thrusts:
+                t.apply_force(dt)
+
+        damping_power = 0
+        for l in self.scene.links:
+            damping_power += l.apply_force()
+        self.damping_power = damping_power
+
+        if self.load_monitor:
+            self.load_monitor.update(self)
+
+        if self.atmosphere:
+            self.atmosphere.apply_drag(self.scene.links, self.sim_time)
+
+        gravity_model = self.gravity_model
+        drag_power = 0
+        for p in points:
+            if gravity_model:
+                p.apply_gravity(vec2(0, -gravity_model.get(p.pos.y)))
+            else:
+                p.apply_gravity()
+            if not self.atmosphere:
+                drag_power += p.apply_drag()
+            p.update_vel(dt)
+            p.update_pos(dt)
+        self.drag_power = drag_power
+
+        self.sim_time += dt
+        self.cycle += 1
+
+        # reads the accelerations, so before they are cleared
+        if self.energy_monitor:
+            self.energy_monitor.update(self, dt)
+
+        for p in points:
+            p.clear_accel()
+
+        self.events.update(self)
+
+        if self.recorder:
+            self.recorder.record(self)
+
+        if self.hasher:
+            self.hasher.update(self)
+
+        monitor = self.abort_monitor
+        if monitor and not self.abort_reason and self.cycle % monitor.check_every == 0:
+            reason = monitor.check(self)
+            if reason:
+                self.abort_reason = reason
+                self.abort_time = self.sim_time
+
+    def run(self, until, dt=0.001):
+        # returns False if the run was aborted before reaching until
+        while self.sim_time < until and not self.abort_reason:
+            self.step(dt)
+
+        return not self.abort_reason
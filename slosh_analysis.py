@@ -0,0 +1,293 @@
+import argparse
+import cmath
+import math
+import os
+import struct
+
+from record import *
+from workers import *
+
+default_masses = ["p10", "p11", "p12", "p13"]
+
+########################
+#         FFT          #
+########################
+
+def fft(values):
+    # iterative radix-2, len(values) must be a power of two
+    n = len(values)
+    a = [complex(v) for v in values]
+
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j |= bit
+        if i < j:
+            a[i], a[j] = a[j], a[i]
+
+    size = 2
+    while size <= n:
+        step = cmath.exp(-2j * math.pi / size)
+        half = size // 2
+        for start in range(0, n, size):
+            w = 1
+            for k in range(start, start + half):
+                u = a[k]
+                v = a[k + half] * w
+                a[k] = u + v
+                a[k + half] = u - v
+                w *= step
+        size *= 2
+
+    return a
+
+def hann_window(n):
+    return [0.5 - 0.5 * math.cos(2 * math.pi * i / n) for i in range(n)]
+
+########################
+#       SPECTRA        #
+########################
+
+class spectrum_accumulator():
+    # Welch averaged spectra fed one sample at a time: windowed, half
+    # overlapping segments are transformed as soon as they fill up, so
+    # memory stays at one segment per channel however long the run is.
+    # channel 0 is the reference, cross spectra are taken against it
+    def __init__(self, channels, segment=1024, sample_period=1):
+        self.channels = channels
+        self.segment = segment
+        self.hop = segment // 2
+        self.sample_period = sample_period
+        self.window = hann_window(segment)
+        self.window_power = sum(w * w for w in self.window)
+
+        bins = segment // 2 + 1
+        self.buffers = [[] for _ in range(channels)]
+        self.auto = [[0] * bins for _ in range(channels)]
+        self.cross = [[0j] * bins for _ in range(channels)]
+        self.segments = 0
+
+    def add(self, sample):
+        for i in range(self.channels):
+            self.buffers[i].append(sample[i])
+
+        if len(self.buffers[0]) == self.segment:
+            self.process_segment()
+            for i in range(self.channels):
+                del self.buffers[i][:self.hop]
+
+    def process_segment(self):
+        bins = self.segment // 2 + 1
+        spectra = []
+
+        for buf in self.buffers:
+            mean = sum(buf) / self.segment
+            spectra.append(fft([(v - mean) * w for v, w in zip(buf, self.window)])[:bins])
+
+        ref = spectra[0]
+        for i in range(self.channels):
+            auto = self.auto[i]
+            cross = self.cross[i]
+            s = spectra[i]
+            for k in range(bins):
+                auto[k] += abs(s[k]) ** 2
+                cross[k] += ref[k].conjugate() * s[k]
+
+        self.segments += 1
+
+    def get_frequencies(self):
+        fs = 1 / self.sample_period
+        return [k * fs / self.segment for k in range(self.segment // 2 + 1)]
+
+    def get_scale(self):
+        # one-sided power spectral density
+        return 2 * self.sample_period / (self.window_power * max(self.segments, 1))
+
+    def get_psd(self, channel):
+        scale = self.get_scale()
+        return [v * scale for v in self.auto[channel]]
+
+    def get_cross(self, channel):
+        scale = self.get_scale()
+        return [v * scale for v in self.cross[channel]]
+
+def find_peak(psd):
+    # skips the DC bin
+    return max(range(1, len(psd)), key=lambda k: psd[k])
+
+def half_power_damping(freqs, psd, k):
+    # damping ratio from the half power bandwidth around bin k
+    half = psd[k] / 2
+
+    lo = k
+    while lo > 0 and psd[lo] > half:
+        lo -= 1
+    hi = k
+    while hi < len(psd) - 1 and psd[hi] > half:
+        hi += 1
+
+    if psd[lo] > half or psd[hi] > half or not freqs[k]:
+        return math.nan
+
+    def crossing(a, b):
+        if psd[a] == psd[b]:
+            return freqs[a]
+        return freqs[a] + (freqs[b] - freqs[a]) * (half - psd[a]) / (psd[b] - psd[a])
+
+    return (crossing(hi, hi - 1) - crossing(lo, lo + 1)) / (2 * freqs[k])
+
+########################
+#       ANALYSIS       #
+########################
+
+def get_wall_points(scene_data, masses):
+    # a propellant mass's tank wall is whatever it is linked to
+    names = [p["name"] for p in scene_data["points"]]
+    walls = {m: [] for m in masses}
+
+    for l in scene_data["links"]:
+        a = names[l["p1"]]
+        b = names[l["p2"]]
+        if a in walls and not b in masses:
+            walls[a].append(b)
+        if b in walls and not a in masses:
+            walls[b].append(a)
+
+    return walls
+
+def analyse_recording(path, masses=default_masses, segment=1024):
+    rec = recording(path)
+
+    try:
+        scene_data = rec.header["scene"]
+        names = [p["name"] for p in scene_data["points"]]
+        tvc_thrust = scene_data["thrusts"][scene_data["tvc"]["thrust"]]
+        origin_slot = rec.get_point_slot(names[tvc_thrust["origin"]])
+        tip_slot = rec.get_point_slot(names[tvc_thrust["p2"]])
+        gimbal_slot = frame_head + scene_data["tvc"]["thrust"]
+
+        walls = get_wall_points(scene_data, masses)
+        for m in masses:
+            if not walls[m]:
+                raise ValueError(m + " is not linked to any tank wall points in " + path)
+
+        mass_slots = [rec.get_point_slot(m) for m in masses]
+        wall_slots = [[rec.get_point_slot(w) for w in walls[m]] for m in masses]
+
+        # the FFT needs a power of two
+        if segment < 2:
+            raise ValueError("Segment length must be at least 2")
+        segment = 1 << (segment.bit_length() - 1)
+
+        while segment > rec.frame_count and segment > 16:
+            segment //= 2
+        if segment > rec.frame_count:
+            raise ValueError(path + " is too short to analyse")
+
+        acc = spectrum_accumulator(1 + len(masses), segment, rec.get_sample_period())
+
+        for chunk in rec.iter_chunks():
+            for frame in chunk:
+                # lateral axis of the vehicle
+                ax = frame[tip_slot] - frame[origin_slot]
+                ay = frame[tip_slot + 1] - frame[origin_slot + 1]
+                length = math.hypot(ax, ay) or 1
+                nx = -ay / length
+                ny = ax / length
+
+                sample = [frame[gimbal_slot]]
+                for slot, wall in zip(mass_slots, wall_slots):
+                    cx = sum(frame[w] for w in wall) / len(wall)
+                    cy = sum(frame[w + 1] for w in wall) / len(wall)
+                    sample.append((frame[slot] - cx) * nx + (frame[slot + 1] - cy) * ny)
+
+                acc.add(sample)
+    finally:
+        rec.close()
+
+    freqs = acc.get_frequencies()
+    gimbal_psd = acc.get_psd(0)
+    rows = []
+
+    for i, m in enumerate(masses):
+        psd = acc.get_psd(i + 1)
+        cross = acc.get_cross(i + 1)
+        k = find_peak(psd)
+
+        denom = gimbal_psd[k] * psd[k]
+        rows.append({"file": os.path.basename(path), "mass": m,
+                     "peak_hz": freqs[k], "peak_psd": psd[k],
+                     "damping": half_power_damping(freqs, psd, k),
+                     "coherence": abs(cross[k]) ** 2 / denom if denom else math.nan,
+                     "phase_deg": math.degrees(cmath.phase(cross[k])),
+                     "segments": acc.segments, "error": ""})
+
+    return rows
+
+def analyse_job(job):
+    # a file that can't be analysed gets an error row rather than
+    # stopping the whole sweep, aborted runs are routine there
+    try:
+        return analyse_recording(*job)
+    except (ValueError, OSError, struct.error) as e:
+        row = {c: math.nan for c in summary_columns}
+        row.update({"file": os.path.basename(job[0]), "mass": "-", "segments": 0, "error": str(e)})
+        return [row]
+
+def analyse_directory(directory, masses=default_masses, segment=1024, processes=None):
+    paths = sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".rec"))
+    jobs = [(p, masses, segment) for p in paths]
+
+    if processes == 1 or len(jobs) < 2:
+        results = [analyse_job(j) for j in jobs]
+    else:
+        pool = worker_pool(processes or os.cpu_count())
+        try:
+            results = pool.map(analyse_job, jobs)
+        finally:
+            pool.close()
+
+    return [row for rows in results for row in rows]
+
+summary_columns = ["file", "mass", "peak_hz", "damping", "coherence", "phase_deg", "peak_psd", "segments",
+                   "error"]
+
+def format_summary(rows, sep="  "):
+    lines = [sep.join(summary_columns)]
+    for row in rows:
+        cells = []
+        for c in summary_columns:
+            v = row[c]
+            cells.append(("%.5g" % v) if isinstance(v, float) else str(v))
+        lines.append(sep.join(cells))
+
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slosh spectra of recorded runs.")
+    parser.add_argument("path", help="a recording, or a directory of .rec recordings")
+    parser.add_argument("--masses", default=",".join(default_masses))
+    parser.add_argument("--segment", type=int, default=1024)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--csv", help="write the summary table here as CSV")
+    args = parser.parse_args(argv)
+
+    masses = args.masses.split(",")
+    try:
+        if os.path.isdir(args.path):
+            rows = analyse_directory(args.path, masses, args.segment, args.processes)
+        else:
+            rows = analyse_recording(args.path, masses, args.segment)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(format_summary(rows))
+    if args.csv:
+        with open(args.csv, "w") as f:
+            f.write(format_summary(rows, ","))
+
+if __name__ == "__main__":
+    main()
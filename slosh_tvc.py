@@ -0,0 +1,153 @@
+import time
+
+startup = time.perf_counter()
+
+import argparse
+import math
+import sys
+
+# command line entry point:
+#   python -m slosh_tvc run [scene.json] [--headless] [--until 60]
+#   python -m slosh_tvc optimise [scene.json] ...
+#   python -m slosh_tvc analyse recording.rec|sweep_dir ...
+#   python -m slosh_tvc replay recording.rec
+# only the modules a command needs get imported, headless runs never
+# touch tkinter
+
+def run(args):
+    if not args.headless:
+        # the viewer builds its window at import time and reads the
+        # scene from its own argv
+        import runpy
+        sys.argv = ["main.py"] + ([args.scene] if args.scene else [])
+        runpy.run_module("main", run_name="__main__")
+        return
+
+    from workers import new_simulation
+
+    sim = new_simulation(args.scene)
+    if args.seed is not None:
+        sim.set_seed(args.seed)
+
+    if args.abort_strain is not None or args.abort_attitude is not None or args.abort_ground is not None:
+        from abort import abort_monitor, build_criteria
+        criteria = build_criteria(args.abort_strain, args.abort_attitude, args.abort_ground)
+        sim.set_abort_monitor(abort_monitor(criteria, args.abort_every))
+
+    # scenes with strength limits come with a load monitor already
+    if args.loads and not sim.load_monitor:
+        from loads import load_monitor
+        sim.set_load_monitor(load_monitor())
+
+    hasher = None
+    if args.hash_every:
+        from determinism import state_hasher
+        hasher = state_hasher(args.hash_every)
+        sim.set_hasher(hasher)
+
+    energy = None
+    if args.energy:
+        from energy import energy_monitor
+        energy = energy_monitor(args.energy_every)
+        sim.set_energy_monitor(energy)
+
+    rec = None
+    if args.record:
+        from record import recorder
+        rec = recorder(args.record, sim, args.every)
+        sim.set_recorder(rec)
+
+    sim.step(args.dt)
+    if args.timing:
+        print("Startup to first step: " + str(round((time.perf_counter() - startup) * 1000, 1)) + " ms")
+
+    start = time.perf_counter()
+    try:
+        sim.run(args.until, args.dt)
+    finally:
+        if rec:
+            rec.close()
+
+    c = sim.controller
+    print("Time: " + str(round(sim.sim_time, 3)) + " s")
+    print("Flight angle: " + str(round(math.degrees(c.current_angle), 2)) + " deg (target " +
+          str(round(c.desired_flight_angle, 2)) + ")")
+    print("Altitude: " + str(round(c.thrust.origin.pos.y, 1)) + " m")
+    if hasher:
+        print("State hash: " + hasher.get_digest())
+        if args.hash_log:
+            with open(args.hash_log, "w") as f:
+                for cycle, digest in hasher.log:
+                    f.write(str(cycle) + " " + digest + "\n")
+    if energy:
+        from energy import format_energy_budget
+        if energy.last[0] != sim.sim_time:
+            energy.history.append(energy.sample(sim))
+        print(format_energy_budget(energy.get_budget()))
+        energy.write_csv(args.energy)
+    if sim.load_monitor:
+        from loads import format_failures, format_peak_loads
+        if sim.load_monitor.failures:
+            print(format_failures(sim.load_monitor.failures))
+        if args.loads:
+            print(format_peak_loads(sim.load_monitor.get_peak_loads(args.loads_count)))
+    if sim.abort_reason:
+        print("Aborted at " + str(round(sim.abort_time, 3)) + " s: " + sim.abort_reason)
+    if args.timing:
+        print("Wall time: " + str(round(time.perf_counter() - start, 3)) + " s")
+
+def optimise(argv):
+    import optimise
+    optimise.main(argv)
+
+def analyse(argv):
+    import slosh_analysis
+    slosh_analysis.main(argv)
+
+def replay(args):
+    # the viewer plays back anything it is given that ends in .rec
+    import runpy
+    sys.argv = ["main.py", args.recording]
+    runpy.run_module("main", run_name="__main__")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # these two parse their own arguments
+    if argv and argv[0] in ("optimise", "analyse"):
+        {"optimise": optimise, "analyse": analyse}[argv[0]](argv[1:])
+        return
+
+    parser = argparse.ArgumentParser(prog="slosh_tvc")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("optimise", help="tune the TVC gains of a scene")
+    commands.add_parser("analyse", help="slosh spectra of recorded runs")
+
+    run_parser = commands.add_parser("run", help="run a scene")
+    run_parser.add_argument("scene", nargs="?", help="scene file, the default rocket if omitted")
+    run_parser.add_argument("--headless", action="store_true")
+    run_parser.add_argument("--until", type=float, default=60)
+    run_parser.add_argument("--dt", type=float, default=0.001)
+    run_parser.add_argument("--record", help="write a recording of the run here")
+    run_parser.add_argument("--every", type=int, default=10, help="record every n-th step")
+    run_parser.add_argument("--timing", action="store_true", help="report startup and run times")
+    run_parser.add_argument("--seed", type=int, help="seed for all stochastic inputs")
+    run_parser.add_argument("--hash-every", type=int, default=0, help="hash the state every n steps")
+    run_parser.add_argument("--hash-log", help="write the state hash checkpoints here")
+    run_parser.add_argument("--energy", help="track the energy budget and write its history here as CSV")
+    run_parser.add_argument("--abort-strain", type=float, help="stop once a link's strain passes this")
+    run_parser.add_argument("--abort-attitude", type=float, help="stop once the attitude error passes this (deg)")
+    run_parser.add_argument("--abort-ground", type=float, help="stop once a point comes this close to the floor (m)")
+    run_parser.add_argument("--abort-every", type=int, default=100, help="check the abort criteria every n steps")
+    run_parser.add_argument("--loads", action="store_true", help="report the peak link loads")
+    run_parser.add_argument("--loads-count", type=int, default=10, help="number of links in the load report")
+    run_parser.add_argument("--energy-every", type=int, default=10, help="keep every n-th budget row")
+
+    replay_parser = commands.add_parser("replay", help="play a recording back in the viewer")
+    replay_parser.add_argument("recording")
+
+    args = parser.parse_args(argv)
+    {"run": run, "replay": replay}[args.command](args)
+
+if __name__ == "__main__":
+    main()
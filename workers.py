@@ -0,0 +1,50 @@
+import json
+
+########################
+#       WORKERS        #
+########################
+
+# scene data each worker process parsed once, by scene path
+preloaded_scenes = {}
+
+def preload_scenes(paths):
+    for path in paths:
+        get_scene_data(path)
+
+def get_scene_data(path):
+    if not path in preloaded_scenes:
+        with open(path) as f:
+            preloaded_scenes[path] = json.load(f)
+
+    return preloaded_scenes[path]
+
+def new_simulation(path=None):
+    # a fresh simulation, from the preloaded scene or the default rocket
+    if path is None:
+        from rocket import build_rocket
+        return build_rocket()
+
+    from scenefile import simulation_from_dict
+    return simulation_from_dict(get_scene_data(path))
+
+class worker_pool():
+    # processes are started once, forked where the platform allows so
+    # they inherit the already imported physics modules, and preload the
+    # given scene files before taking any jobs
+    def __init__(self, processes, scene_paths=()):
+        # only pay for multiprocessing when a pool is actually wanted
+        import multiprocessing
+
+        try:
+            ctx = multiprocessing.get_context("fork")
+        except ValueError:
+            ctx = multiprocessing.get_context()
+
+        self.pool = ctx.Pool(processes, preload_scenes, (list(scene_paths),))
+
+    def map(self, func, jobs):
+        return self.pool.map(func, jobs)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()